@@ -0,0 +1,260 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, jsonify, request, send_file, url_for
+
+"""
+HTTP转换服务: vercel.json把所有请求路由到这里，也可以在本地直接运行供多人共用:
+  python api/index.py
+
+上传的文件流式保存到任务目录，任务交给有界的线程池执行，
+通过任务状态接口查询进度，完成后以文件流的形式下载结果。
+"""
+
+# scripts等模块位于仓库根目录
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+# 并发执行的任务数、排队上限、结果保留时间和上传大小上限
+MAX_WORKERS = int(os.environ.get("I18NTOOL_API_WORKERS", "2"))
+MAX_PENDING_JOBS = int(os.environ.get("I18NTOOL_API_MAX_PENDING", "16"))
+JOB_TTL_SECONDS = int(os.environ.get("I18NTOOL_API_JOB_TTL", "3600"))
+MAX_UPLOAD_BYTES = int(os.environ.get("I18NTOOL_API_MAX_UPLOAD", str(512 * 1024 * 1024)))
+
+# 复制上传文件时的块大小
+COPY_CHUNK_SIZE = 1 << 20
+
+app = Flask(__name__)
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
+
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="i18ntool-job")
+jobs = {}
+jobs_lock = threading.Lock()
+
+
+class JobRejected(Exception):
+    """排队的任务已达上限"""
+
+
+def save_upload(field, directory, default_name):
+    """把上传文件分块写入任务目录，返回保存后的路径"""
+    upload = request.files.get(field)
+    if upload is None or not upload.filename:
+        raise ValueError(f"缺少上传文件: {field}")
+    name = os.path.basename(upload.filename) or default_name
+    path = os.path.join(directory, f"{field}-{name}")
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(upload.stream, f, COPY_CHUNK_SIZE)
+    return path
+
+
+def cleanup_jobs():
+    """删除超过保留时间的已结束任务及其文件"""
+    now = time.time()
+    with jobs_lock:
+        expired = [job_id for job_id, job in jobs.items()
+                   if job["finished_at"] and now - job["finished_at"] > JOB_TTL_SECONDS]
+        for job_id in expired:
+            shutil.rmtree(jobs.pop(job_id)["directory"], ignore_errors=True)
+
+
+def submit_job(kind, directory, func):
+    """
+    登记任务并交给线程池执行。
+    func(progress) 返回 (统计信息, 结果文件路径, 下载文件名)
+    """
+    with jobs_lock:
+        pending = sum(1 for job in jobs.values() if job["status"] in ("queued", "running"))
+        if pending >= MAX_PENDING_JOBS:
+            raise JobRejected()
+        job_id = uuid.uuid4().hex
+        job = jobs[job_id] = {
+            "id": job_id,
+            "kind": kind,
+            "status": "queued",
+            "stage": None,
+            "done": 0,
+            "total": 0,
+            "stats": None,
+            "error": None,
+            "directory": directory,
+            "result_path": None,
+            "download_name": None,
+            "created_at": time.time(),
+            "finished_at": None,
+        }
+
+    def progress(stage, done, total):
+        job.update(stage=stage, done=done, total=total)
+
+    def run():
+        job["status"] = "running"
+        try:
+            stats, result_path, download_name = func(progress)
+            job.update(stats=stats, result_path=result_path, download_name=download_name, status="done")
+        except Exception as e:
+            job.update(error=str(e), status="error")
+        finally:
+            job["finished_at"] = time.time()
+
+    executor.submit(run)
+    return job
+
+
+def job_view(job):
+    """任务状态的JSON表示"""
+    view = {key: job[key] for key in ("id", "kind", "status", "stage", "done", "total", "stats", "error")}
+    view["status_url"] = url_for("job_status", job_id=job["id"])
+    if job["status"] == "done":
+        view["result_url"] = url_for("job_result", job_id=job["id"])
+    return view
+
+
+def start_job(kind, build):
+    """
+    为请求创建任务目录，build(directory) 保存上传文件并返回任务函数。
+    成功时返回202和任务状态。
+    """
+    cleanup_jobs()
+    directory = tempfile.mkdtemp(prefix="i18ntool-job-")
+    try:
+        func = build(directory)
+        job = submit_job(kind, directory, func)
+    except ValueError as e:
+        shutil.rmtree(directory, ignore_errors=True)
+        return jsonify({"error": str(e)}), 400
+    except JobRejected:
+        shutil.rmtree(directory, ignore_errors=True)
+        return jsonify({"error": "服务繁忙，请稍后再试"}), 503
+    return jsonify(job_view(job)), 202
+
+
+def compare_job(kind, func_name, source_suffix):
+    """对比任务: 上传source和dist，返回更新后的dist"""
+    def build(directory):
+        source = save_upload("source", directory, "source" + source_suffix)
+        dist = save_upload("dist", directory, "dist.xlsx")
+        # 下载时使用上传时的文件名
+        download_name = os.path.basename(dist)[len("dist-"):]
+        mode = request.form.get("mode", "rewrite")
+        if mode not in ("rewrite", "patch"):
+            raise ValueError(f"不支持的更新模式: {mode}")
+
+        def run(progress):
+            import scripts
+            stats = getattr(scripts, func_name)(source, dist, mode, progress=progress)
+            return stats, dist, download_name
+        return run
+    return start_job(kind, build)
+
+
+@app.route("/")
+def index():
+    return jsonify({
+        "service": "i18ntool",
+        "endpoints": {
+            "POST /api/compare/xml-excel": "source=XML, dist=Excel母本, mode=rewrite|patch",
+            "POST /api/compare/excel-excel": "source=Excel, dist=Excel母本, mode=rewrite|patch",
+            "POST /api/export/xml": "source=Excel，结果为UILanguage_*.xml的zip",
+            "POST /api/export/game": "source=Excel，结果为strings-zh_tc.xml",
+            "GET /api/jobs/<id>": "任务状态",
+            "GET /api/jobs/<id>/result": "下载结果",
+            "DELETE /api/jobs/<id>": "删除任务及其文件",
+        },
+    })
+
+
+@app.route("/api/compare/xml-excel", methods=["POST"])
+def compare_xml_excel():
+    return compare_job("compare_xml_excel", "convert_xml_to_excel", ".xml")
+
+
+@app.route("/api/compare/excel-excel", methods=["POST"])
+def compare_excel_excel():
+    return compare_job("compare_excel", "compare_language_excel", ".xlsx")
+
+
+@app.route("/api/export/xml", methods=["POST"])
+def export_xml():
+    def build(directory):
+        source = save_upload("source", directory, "source.xlsx")
+
+        def run(progress):
+            import scripts
+            output_dir = os.path.join(directory, "output")
+            os.makedirs(output_dir)
+            stats = scripts.convert_excel_to_xml(source, output_dir, progress=progress)
+            archive = os.path.join(directory, "UILanguage.zip")
+            with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+                # 只打包语言文件，不包含导出时写入的清单等其他文件
+                for name in sorted(os.listdir(output_dir)):
+                    if name.startswith("UILanguage_") and name.endswith(".xml"):
+                        zf.write(os.path.join(output_dir, name), name)
+            return stats if isinstance(stats, dict) else None, archive, "UILanguage.zip"
+        return run
+    return start_job("export_xml", build)
+
+
+@app.route("/api/export/game", methods=["POST"])
+def export_game():
+    def build(directory):
+        source = save_upload("source", directory, "source.xlsx")
+
+        def run(progress):
+            import scripts
+            output_file = os.path.join(directory, "strings-zh_tc.xml")
+            stats = scripts.convert_excel_to_xml_game(source, output_file, progress=progress)
+            return stats if isinstance(stats, dict) else None, output_file, "strings-zh_tc.xml"
+        return run
+    return start_job("export_game", build)
+
+
+def find_job(job_id):
+    with jobs_lock:
+        return jobs.get(job_id)
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = find_job(job_id)
+    if job is None:
+        return jsonify({"error": "任务不存在"}), 404
+    return jsonify(job_view(job))
+
+
+@app.route("/api/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    job = find_job(job_id)
+    if job is None:
+        return jsonify({"error": "任务不存在"}), 404
+    if job["status"] != "done":
+        return jsonify(job_view(job)), 409
+    # send_file按块读取文件，结果不会整体载入内存
+    return send_file(job["result_path"], as_attachment=True, download_name=job["download_name"])
+
+
+@app.route("/api/jobs/<job_id>", methods=["DELETE"])
+def delete_job(job_id):
+    with jobs_lock:
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({"error": "任务不存在"}), 404
+        if job["status"] in ("queued", "running"):
+            return jsonify({"error": "任务尚未结束"}), 409
+        jobs.pop(job_id)
+    shutil.rmtree(job["directory"], ignore_errors=True)
+    return "", 204
+
+
+if __name__ == "__main__":
+    app.run(host=os.environ.get("I18NTOOL_API_HOST", "127.0.0.1"),
+            port=int(os.environ.get("I18NTOOL_API_PORT", "5000")),
+            threaded=True)
@@ -0,0 +1,207 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import time
+
+"""
+scripts.py公共功能的基准测试: 用合成数据测量各功能在不同规模下的耗时、峰值内存和吞吐量，
+结果可以保存为JSON基线，之后的运行与基线对比，变慢超过容差时以非零退出码结束。
+
+用法:
+  python benchmarks/bench_scripts.py --sizes 1k,10k --save-baseline benchmarks/baseline.json
+  python benchmarks/bench_scripts.py --sizes 1k,10k --baseline benchmarks/baseline.json --tolerance 0.25
+"""
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+for path in (REPO_DIR, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import synthetic  # noqa: E402
+
+FUNCTIONS = ("compare_excel", "compare_xml_excel", "excel_to_xml", "excel_to_xml_game", "xml_to_excel")
+
+SIZE_SUFFIXES = {"k": 1000, "m": 1000000}
+
+# 单次运行的默认超时 (秒)
+DEFAULT_TIMEOUT = 3600
+
+
+def parse_size(text):
+    """解析 1k / 10k / 1m 形式的规模"""
+    text = text.strip().lower()
+    if text[-1:] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存 (MB)，不支持的平台返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux单位为KB，macOS为字节
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_function(name, paths, work_dir):
+    """在当前进程中执行一个功能，返回耗时 (秒)"""
+    import scripts
+    from parse_cache import set_default_cache
+
+    # 测量真实的解析耗时，不使用解析缓存
+    set_default_cache(False)
+
+    if name == "compare_excel":
+        dist = shutil.copy(paths["master"], os.path.join(work_dir, "dist.xlsx"))
+        call = lambda: scripts.ExcelProcessor.compare_excel(paths["source_excel"], dist)
+    elif name == "compare_xml_excel":
+        dist = shutil.copy(paths["master"], os.path.join(work_dir, "dist.xlsx"))
+        call = lambda: scripts.ExcelProcessor.compare_xml_excel(paths["source_xml"], dist)
+    elif name == "excel_to_xml":
+        call = lambda: scripts.XMLProcessor.excel_to_xml(paths["master"], work_dir)
+    elif name == "excel_to_xml_game":
+        call = lambda: scripts.XMLProcessor.excel_to_xml_game(paths["game"], os.path.join(work_dir, "game.xml"))
+    elif name == "xml_to_excel":
+        call = lambda: scripts.XMLProcessor.xml_to_excel(paths["convertor_xml"], os.path.join(work_dir, "out.xlsx"))
+    else:
+        raise ValueError(f"未知的功能: {name}")
+
+    start = time.perf_counter()
+    call()
+    return time.perf_counter() - start
+
+
+def child_main(name, paths, result_queue):
+    """子进程入口: 每个功能在独立进程中运行，峰值内存互不影响"""
+    import contextlib
+    import io
+
+    work_dir = tempfile.mkdtemp(prefix="i18ntool-bench-")
+    try:
+        import scripts  # noqa: F401  先导入依赖，记录导入后的内存基数
+        import_rss = peak_rss_mb()
+        with contextlib.redirect_stdout(io.StringIO()):
+            seconds = run_function(name, paths, work_dir)
+        result_queue.put({"seconds": seconds, "peak_rss_mb": peak_rss_mb(), "import_rss_mb": import_rss})
+    except Exception as e:
+        result_queue.put({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def wait_result(process, result_queue, timeout):
+    """
+    等待子进程放入结果。子进程没有放入结果就退出 (如被OOM终止或崩溃)，
+    或超过timeout秒仍未完成时，返回记录失败原因的结果，不会一直阻塞
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return result_queue.get(timeout=1)
+        except queue.Empty:
+            pass
+        if not process.is_alive():
+            # 子进程可能在退出前刚放入结果
+            try:
+                return result_queue.get(timeout=1)
+            except queue.Empty:
+                return {"error": f"子进程异常退出，退出码 {process.exitcode}"}
+        if time.monotonic() > deadline:
+            process.terminate()
+            return {"error": f"超过 {timeout} 秒未完成"}
+
+
+def measure(name, paths, size, repeat, timeout=DEFAULT_TIMEOUT):
+    """重复执行取最快的一次，失败或超时时返回带error的结果"""
+    context = multiprocessing.get_context("spawn")
+    best = None
+    for _ in range(repeat):
+        result_queue = context.Queue()
+        process = context.Process(target=child_main, args=(name, paths, result_queue))
+        process.start()
+        result = wait_result(process, result_queue, timeout)
+        process.join()
+        if "error" in result:
+            return result
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    best["seconds"] = round(best["seconds"], 4)
+    best["keys_per_second"] = round(size / best["seconds"]) if best["seconds"] else None
+    return best
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """返回比基线慢超过容差的条目"""
+    regressions = []
+    for case, result in results.items():
+        previous = baseline.get(case)
+        if not previous or "seconds" not in result or "seconds" not in previous:
+            continue
+        ratio = result["seconds"] / previous["seconds"] if previous["seconds"] else 1.0
+        result["baseline_seconds"] = previous["seconds"]
+        result["ratio"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(f"{case}: {previous['seconds']}s -> {result['seconds']}s (x{ratio:.2f})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="scripts.py基准测试")
+    parser.add_argument("--sizes", default="1k,10k", help="键数量，逗号分隔，如 1k,10k,100k,1m")
+    parser.add_argument("--functions", default=",".join(FUNCTIONS), help="要测试的功能，逗号分隔")
+    parser.add_argument("--change-ratio", type=float, default=0.05, help="源数据中修改的比例")
+    parser.add_argument("--add-ratio", type=float, default=0.02, help="源数据中新增的比例")
+    parser.add_argument("--repeat", type=int, default=1, help="每项重复次数，取最快的一次")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="单次运行的超时 (秒)，超时或子进程崩溃时记为失败并继续下一项")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "i18ntool-bench-data"),
+                        help="合成数据目录，已生成的数据会被复用")
+    parser.add_argument("--baseline", help="与该JSON基线对比")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许比基线慢的比例")
+    parser.add_argument("--save-baseline", help="把本次结果保存为JSON基线")
+    args = parser.parse_args(argv)
+
+    functions = [name.strip() for name in args.functions.split(",") if name.strip()]
+    results = {}
+    for size in (parse_size(text) for text in args.sizes.split(",")):
+        directory = os.path.join(args.data_dir, f"{size}-c{args.change_ratio}-a{args.add_ratio}")
+        print(f"准备 {size} 个键的数据: {directory}", file=sys.stderr)
+        paths = synthetic.generate_files(directory, size, args.change_ratio, args.add_ratio)
+        for name in functions:
+            case = f"{name}@{size}"
+            results[case] = measure(name, paths, size, args.repeat, args.timeout)
+            print(f"{case}: {results[case]}", file=sys.stderr)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_with_baseline(results, json.load(f)["results"], args.tolerance)
+
+    report = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "change_ratio": args.change_ratio,
+        "add_ratio": args.add_ratio,
+        "results": results,
+        "regressions": regressions,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            f.write(text)
+    failed = any("error" in result for result in results.values())
+    return 1 if regressions or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
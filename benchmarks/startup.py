@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+"""
+GUI冷启动基准: 测量界面模块的导入时间和从进程启动到第一个窗口显示的时间，
+超过阈值时以非零退出码结束，用于在CI中发现启动变慢的回归。
+
+用法:
+  python benchmarks/startup.py --runs 5 --max-import 0.5 --max-first-window 1.5
+"""
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在子进程中执行，保证每次都是冷启动
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import template
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in ("pandas", "lxml", "openpyxl", "scripts") if name in sys.modules)
+print(json.dumps([elapsed, heavy]))
+"""
+
+FIRST_WINDOW_PROBE = """
+import json, sys, time
+spawned_at = float(sys.argv[1])
+import tkinter as tk
+from template import ExcelToXmlConverterApp
+try:
+    root = tk.Tk()
+except tk.TclError as e:
+    print(json.dumps(None))
+    sys.exit(0)
+app = ExcelToXmlConverterApp(root)
+root.update()
+deadline = time.time() + 30
+while not root.winfo_viewable() and time.time() < deadline:
+    root.update()
+elapsed = time.time() - spawned_at
+root.destroy()
+print(json.dumps(elapsed))
+"""
+
+
+def run_probe(code, *args):
+    """在子进程中执行探测代码，返回其最后一行输出的JSON"""
+    output = subprocess.run([sys.executable, "-c", code, *args], cwd=REPO_DIR,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure(runs):
+    import_times, first_window_times, heavy_modules = [], [], set()
+    for _ in range(runs):
+        elapsed, heavy = run_probe(IMPORT_PROBE)
+        import_times.append(elapsed)
+        heavy_modules.update(heavy)
+
+        first_window = run_probe(FIRST_WINDOW_PROBE, repr(time.time()))
+        if first_window is not None:
+            first_window_times.append(first_window)
+
+    return {
+        "runs": runs,
+        "import_seconds": min(import_times),
+        "first_window_seconds": min(first_window_times) if first_window_times else None,
+        "heavy_modules_at_import": sorted(heavy_modules),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GUI冷启动基准")
+    parser.add_argument("--runs", type=int, default=3, help="重复次数，取最小值")
+    parser.add_argument("--max-import", type=float, help="导入时间上限 (秒)")
+    parser.add_argument("--max-first-window", type=float, help="首个窗口显示时间上限 (秒)")
+    parser.add_argument("--json-out", help="把结果写入JSON文件")
+    args = parser.parse_args(argv)
+
+    result = measure(args.runs)
+    failures = []
+    if result["heavy_modules_at_import"]:
+        failures.append(f"启动时导入了重量级模块: {', '.join(result['heavy_modules_at_import'])}")
+    if args.max_import is not None and result["import_seconds"] > args.max_import:
+        failures.append(f"导入时间 {result['import_seconds']:.3f}s 超过 {args.max_import}s")
+    first_window = result["first_window_seconds"]
+    if first_window is None:
+        print("没有可用的显示器，跳过首个窗口的测量", file=sys.stderr)
+    elif args.max_first_window is not None and first_window > args.max_first_window:
+        failures.append(f"首个窗口显示时间 {first_window:.3f}s 超过 {args.max_first_window}s")
+    result["failures"] = failures
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    print(text)
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
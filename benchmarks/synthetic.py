@@ -0,0 +1,126 @@
+import os
+import random
+
+from openpyxl import Workbook
+from xml.sax.saxutils import escape
+
+"""
+基准测试用的合成数据: 生成FairyGUI多语言XML、多语言母本、游戏表和LanguageStringConvertor格式的XML。
+同样的参数总是生成同样的数据，便于不同版本之间对比。
+"""
+
+DEFAULT_LANGUAGES = ("en", "ja", "ko", "zh_tc")
+
+# 生成文本时使用的词表，混入需要转义的字符
+WORDS = ("确定", "取消", "背包", "任务", "Level", "Gold", "<b>", "&", "商店", "设置", "奖励", "Boss", "\"x\"", "副本")
+
+
+def make_key(index):
+    """生成与compare_xml_excel拼接方式一致的属性字符串KEY"""
+    return f'name="c{index // 40:06d}-n{index % 40}" mz="Component{index % 97}"'
+
+
+def make_text(rng, index, words=6):
+    return f"{' '.join(rng.choice(WORDS) for _ in range(words))} {index}"
+
+
+def build_scenario(size, change_ratio=0.05, add_ratio=0.02, languages=DEFAULT_LANGUAGES, seed=0):
+    """
+    生成一组数据:
+      master: 母本 (KEY, VALUE1, 各语言列)
+      source: 源数据，按change_ratio修改已有的值，按add_ratio追加新键
+    """
+    rng = random.Random(seed)
+    keys = [make_key(i) for i in range(size)]
+    values = [make_text(rng, i) for i in range(size)]
+    translations = {language: [f"[{language}] {value}" for value in values] for language in languages}
+
+    source_values = list(values)
+    for i in rng.sample(range(size), int(size * change_ratio)):
+        source_values[i] = source_values[i] + " (改)"
+    added = int(size * add_ratio)
+    source_keys = keys + [make_key(size + i) for i in range(added)]
+    source_values += [make_text(rng, size + i) for i in range(added)]
+
+    return {
+        "master": (keys, values, translations),
+        "source": (source_keys, source_values),
+    }
+
+
+def write_master_workbook(path, keys, values, translations):
+    """写出多语言母本: ID, KEY, VALUE1, 各语言列"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    languages = list(translations)
+    ws.append(["ID", "KEY", "VALUE1"] + languages)
+    for i, (key, value) in enumerate(zip(keys, values)):
+        ws.append([i, key, value] + [translations[language][i] for language in languages])
+    wb.save(path)
+
+
+def write_source_workbook(path, keys, values):
+    """写出只有KEY和VALUE1的源表格"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(["KEY", "VALUE1"])
+    for row in zip(keys, values):
+        ws.append(row)
+    wb.save(path)
+
+
+def write_game_workbook(path, keys, values):
+    """写出游戏表格式: KEY, ID, Value1, Value2, Tag"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(["KEY", "ID", "Value1", "Value2", "Tag"])
+    for i, (key, value) in enumerate(zip(keys, values)):
+        ws.append([key, i, value, value if i % 3 else None, "ui" if i % 2 else "game"])
+    wb.save(path)
+
+
+def write_strings_xml(path, keys, values):
+    """写出FairyGUI导出的多语言XML，个别条目带有ETX控制字符"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<resources>\n')
+        for i, (key, value) in enumerate(zip(keys, values)):
+            # KEY本身就是合法的属性字符串
+            etx = "\x03" if i % 101 == 0 else ""
+            f.write(f"  <string {key}>{escape(value)}{etx}</string>\n")
+        f.write("</resources>")
+
+
+def write_convertor_xml(path, keys, values):
+    """写出xml_to_excel读取的 /root/data/LanguageStringConvertor/entry 格式"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<root><data><LanguageStringConvertor>\n')
+        for key, value in zip(keys, values):
+            f.write(f"<entry><KEY>{escape(key)}</KEY><VALUE1>{escape(value)}</VALUE1></entry>\n")
+        f.write("</LanguageStringConvertor></data></root>")
+
+
+def generate_files(directory, size, change_ratio=0.05, add_ratio=0.02, languages=DEFAULT_LANGUAGES, seed=0):
+    """
+    在directory下生成一组基准数据文件，已存在的文件不会重新生成。
+    返回各文件的路径。
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        "master": os.path.join(directory, "master.xlsx"),
+        "source_excel": os.path.join(directory, "source.xlsx"),
+        "source_xml": os.path.join(directory, "source.xml"),
+        "game": os.path.join(directory, "game.xlsx"),
+        "convertor_xml": os.path.join(directory, "convertor.xml"),
+    }
+    if all(os.path.exists(path) for path in paths.values()):
+        return paths
+
+    scenario = build_scenario(size, change_ratio, add_ratio, languages, seed)
+    keys, values, translations = scenario["master"]
+    source_keys, source_values = scenario["source"]
+    write_master_workbook(paths["master"], keys, values, translations)
+    write_source_workbook(paths["source_excel"], source_keys, source_values)
+    write_strings_xml(paths["source_xml"], source_keys, source_values)
+    write_game_workbook(paths["game"], keys, values)
+    write_convertor_xml(paths["convertor_xml"], keys, values)
+    return paths
@@ -0,0 +1,210 @@
+import argparse
+import contextlib
+import glob
+import json
+import os
+import sys
+import time
+
+"""
+命令行入口: 供CI和批处理流水线调用，不依赖tkinter。
+结果统计以JSON输出到标准输出，处理过程中的日志输出到标准错误。
+
+示例:
+  python cli.py convert_xml_to_excel "strings/*.xml" --dist master.xlsx --mode patch
+  python cli.py compare_language_excel "translated/*.xlsx" --dist master.xlsx
+  python cli.py compare_language_excel translated.xlsx --dist master.xlsx --columns all
+  python cli.py merge_language_excel translated.xlsx --base master_base.xlsx --dist master.xlsx
+  python cli.py convert_project_to_excel UIProject/ --dist master.xlsx --workers 8
+  python cli.py convert_excel_to_xml master.xlsx --output out/ --workers 4
+  python cli.py convert_excel_to_xml_game "tables/*.xlsx" --output out/
+  python cli.py watch --pair strings/zh.xml master.xlsx --debounce 2
+  python cli.py --trace-file trace.json --trace-memory compare_language_excel src.xlsx --dist master.xlsx
+"""
+
+
+def expand_inputs(patterns):
+    """展开通配符，保持参数顺序并去重；没有匹配的模式按字面路径保留，交给后续步骤报错"""
+    files, seen = [], set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for path in matches:
+            if path not in seen:
+                seen.add(path)
+                files.append(path)
+    return files
+
+
+def batch_output(output, input_file, batch):
+    """批量导出时每个输入文件使用以其文件名命名的子目录，避免互相覆盖"""
+    if not batch:
+        return output
+    directory = os.path.join(output, os.path.splitext(os.path.basename(input_file))[0])
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="i18ntool", description="FairyGUI多语言表格工具 (命令行)")
+    parser.add_argument("--json-out", help="把JSON统计同时写入该文件")
+    parser.add_argument("--backend", help="Excel读取后端 (默认openpyxl)")
+    parser.add_argument("--no-cache", action="store_true", help="不使用Excel解析缓存")
+    parser.add_argument("--fail-fast", action="store_true", help="遇到第一个错误时停止")
+    parser.add_argument("--trace-file", help="把各阶段的耗时写入Chrome trace格式的JSON文件")
+    parser.add_argument("--trace-memory", action="store_true", help="用tracemalloc统计各阶段的内存峰值 (较慢)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for command, help_text in (("convert_xml_to_excel", "XML与Excel母本对比并更新母本"),
+                               ("compare_language_excel", "Excel与Excel母本对比并更新母本")):
+        sub = subparsers.add_parser(command, help=help_text)
+        sub.add_argument("inputs", nargs="+", help="源文件，支持通配符，按顺序依次合并到母本")
+        sub.add_argument("--dist", required=True, help="翻译母本Excel文件")
+        sub.add_argument("--mode", choices=("rewrite", "patch"), default="rewrite",
+                         help="rewrite重新写出母本，patch只修改变化的单元格")
+        sub.add_argument("--detect-renames", action="store_true",
+                         help="识别改名的键 (按文本和KEY的相似度配对)，改写旧行而不是追加新行")
+        if command == "compare_language_excel":
+            sub.add_argument("--columns", help="一次对比多个语言列: 逗号分隔的列名，all表示两边共有的全部语言列；不能与--detect-renames同时使用")
+
+    sub = subparsers.add_parser("convert_project_to_excel", help="扫描FairyGUI工程目录并与Excel母本对比")
+    sub.add_argument("inputs", nargs="+", help="FairyGUI工程目录 (包含各个包的package.xml)")
+    sub.add_argument("--dist", required=True, help="翻译母本Excel文件")
+    sub.add_argument("--mode", choices=("rewrite", "patch"), default="rewrite",
+                     help="rewrite重新写出母本，patch只修改变化的单元格")
+    sub.add_argument("--detect-renames", action="store_true",
+                     help="识别改名的键 (按文本和KEY的相似度配对)，改写旧行而不是追加新行")
+    sub.add_argument("--workers", type=int, default=None, help="并行解析组件文件的进程数 (默认CPU核数)")
+
+    sub = subparsers.add_parser("merge_language_excel", help="以共同祖先为基准三方合并翻译修改后的表格")
+    sub.add_argument("inputs", nargs="+", help="翻译修改后的表格 (theirs)，支持通配符，按顺序依次合并")
+    sub.add_argument("--base", required=True, help="翻译开始时的母本副本 (共同祖先)")
+    sub.add_argument("--dist", required=True, help="当前的翻译母本Excel文件 (ours)")
+    sub.add_argument("--mode", choices=("rewrite", "patch"), default="rewrite",
+                     help="rewrite重新写出母本，patch只修改变化的单元格")
+
+    sub = subparsers.add_parser("convert_excel_to_xml", help="导出UI多语言XML")
+    sub.add_argument("inputs", nargs="+", help="Excel文件，支持通配符")
+    sub.add_argument("--output", required=True, help="输出文件夹")
+    sub.add_argument("--workers", type=int, default=None, help="并行导出的进程数")
+    sub.add_argument("--buffer-size", type=int, default=None, help="写文件缓冲区大小 (字节)")
+
+    sub = subparsers.add_parser("convert_excel_to_xml_game", help="导出游戏表格式XML")
+    sub.add_argument("inputs", nargs="+", help="Excel文件，支持通配符")
+    sub.add_argument("--output", required=True, help="输出文件夹或XML文件路径")
+
+    sub = subparsers.add_parser("watch", help="监视源文件，变化后增量同步到母本 (Ctrl+C退出)")
+    sub.add_argument("--pair", nargs=2, action="append", required=True, metavar=("SOURCE", "DIST"),
+                     help="源文件 (XML或Excel) 和对应的母本，可以指定多次；源文件支持通配符")
+    sub.add_argument("--mode", choices=("rewrite", "patch"), default="patch",
+                     help="patch只修改变化的单元格 (默认)，rewrite重新写出母本")
+    sub.add_argument("--interval", type=float, default=None, help="轮询间隔 (秒)")
+    sub.add_argument("--debounce", type=float, default=None, help="最后一次变化后等待多久再同步 (秒)")
+
+    return parser
+
+
+def run_watch(args):
+    """监视模式: 每次同步输出一行JSON到标准输出"""
+    import watch
+
+    def report(result):
+        print(json.dumps(result, ensure_ascii=False), file=sys.__stdout__, flush=True)
+
+    pairs = [(source, dist) for pattern, dist in args.pair for source in expand_inputs([pattern])]
+    watcher = watch.Watcher(pairs, args.mode,
+                            args.interval if args.interval is not None else watch.DEFAULT_INTERVAL,
+                            args.debounce if args.debounce is not None else watch.DEFAULT_DEBOUNCE,
+                            on_sync=report)
+    watcher.run()
+    return 0
+
+
+def run_job(scripts, args, input_file, batch):
+    """执行单个输入文件，返回该文件的结果记录"""
+    if args.command == "convert_xml_to_excel":
+        record = {"input": input_file, "dist": args.dist}
+        call = lambda: scripts.convert_xml_to_excel(input_file, args.dist, args.mode,
+                                                    detect_renames=args.detect_renames)
+    elif args.command == "convert_project_to_excel":
+        record = {"input": input_file, "dist": args.dist}
+        call = lambda: scripts.convert_project_to_excel(input_file, args.dist, args.mode,
+                                                        detect_renames=args.detect_renames, workers=args.workers)
+    elif args.command == "compare_language_excel":
+        record = {"input": input_file, "dist": args.dist}
+        if args.columns:
+            columns = None if args.columns == "all" else [name.strip() for name in args.columns.split(",")]
+            call = lambda: scripts.compare_language_excel_columns(input_file, args.dist, columns, args.mode)
+        else:
+            call = lambda: scripts.compare_language_excel(input_file, args.dist, args.mode,
+                                                          detect_renames=args.detect_renames)
+    elif args.command == "merge_language_excel":
+        record = {"input": input_file, "base": args.base, "dist": args.dist}
+        call = lambda: scripts.merge_language_excel(args.base, input_file, args.dist, args.mode)
+    elif args.command == "convert_excel_to_xml":
+        output = batch_output(args.output, input_file, batch)
+        # 单个输入时直接输出到--output，目录不存在时同样需要创建
+        os.makedirs(output, exist_ok=True)
+        record = {"input": input_file, "output": output}
+        buffer_size = args.buffer_size or scripts.DEFAULT_XML_BUFFER_SIZE
+        call = lambda: scripts.convert_excel_to_xml(input_file, output, buffer_size, args.workers)
+    else:
+        output = batch_output(args.output, input_file, batch)
+        record = {"input": input_file, "output": output}
+        call = lambda: scripts.convert_excel_to_xml_game(input_file, output)
+
+    start = time.perf_counter()
+    try:
+        result = call()
+        record["ok"] = True
+        record["stats"] = result if isinstance(result, dict) else {}
+    except Exception as e:
+        record["ok"] = False
+        record["error"] = str(e)
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "columns", None) and args.detect_renames:
+        parser.error("--columns 按列对比时不支持 --detect-renames")
+
+    # 处理函数的日志打印到标准错误，标准输出只保留JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        import scripts
+        from parse_cache import set_default_cache
+        from tracing import configure_tracing
+
+        configure_tracing(args.trace_file, args.trace_memory)
+        if args.no_cache:
+            set_default_cache(False)
+        if args.backend:
+            scripts.ExcelReader.default_backend = args.backend
+
+        if args.command == "watch":
+            return run_watch(args)
+
+        inputs = expand_inputs(args.inputs)
+        results = []
+        for input_file in inputs:
+            record = run_job(scripts, args, input_file, batch=len(inputs) > 1)
+            results.append(record)
+            if not record["ok"] and args.fail_fast:
+                break
+
+    report = {
+        "command": args.command,
+        "ok": all(record["ok"] for record in results),
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
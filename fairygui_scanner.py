@@ -0,0 +1,145 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import lxml.etree as etree
+
+"""
+FairyGUI工程扫描: 遍历工程目录下所有包的package.xml和组件XML，提取需要翻译的文本，
+生成与编辑器导出的多语言XML相同的KEY (name="包ID组件ID-元件ID" mz="组件名")，
+不需要先在编辑器中导出字符串就可以直接交给对比流程。
+
+元件ID之后的后缀与FairyGUI的TranslationHelper一致:
+  文本/富文本的text无后缀，输入文本的提示文字为 -prompt
+  按钮/标签/下拉框的title无后缀，按钮的selectedTitle为 -0，下拉框和列表的第n项为 -n
+  gearText各页面的文本为 -texts_n，默认文本为 -texts_def
+
+组件文件用iterparse流式解析，文件较多时分配到进程池并行解析。
+本模块不导入pandas，子进程可以快速启动。
+"""
+
+# 组件文件少于该数量时直接在当前进程解析，启动进程池反而更慢
+SERIAL_THRESHOLD = 32
+
+# 带有title等属性的组件扩展
+_EXTENSIONS = ("Button", "Label", "ComboBox")
+
+
+def find_packages(project_dir):
+    """工程目录下所有的package.xml，按路径排序"""
+    packages = []
+    for root, _, files in os.walk(project_dir):
+        if "package.xml" in files:
+            packages.append(os.path.join(root, "package.xml"))
+    return sorted(packages)
+
+
+def read_package(package_file):
+    """读取package.xml，返回 (包ID, [(组件ID, 组件名, 组件文件路径)])"""
+    package_dir = os.path.dirname(package_file)
+    package_id, components = "", []
+    for event, element in etree.iterparse(package_file, events=("start", "end"), recover=True):
+        if event == "start":
+            if element.tag == "packageDescription":
+                package_id = element.get("id", "")
+            continue
+        if element.tag == "component":
+            name = element.get("name", "")
+            folder = element.get("path", "/").strip("/").split("/")
+            components.append((element.get("id", ""), os.path.splitext(name)[0],
+                               os.path.join(package_dir, *folder, name)))
+            element.clear()
+    return package_id, components
+
+
+def _element_texts(element):
+    """一个displayList元件中需要翻译的 (后缀, 文本)"""
+    tag = element.tag
+    if tag in ("text", "richtext"):
+        yield "", element.get("text")
+        if element.get("input") == "true":
+            yield "-prompt", element.get("prompt")
+    elif tag == "list":
+        for index, item in enumerate(element.iterchildren("item")):
+            yield f"-{index}", item.get("title")
+    elif tag == "component":
+        for extension in element.iterchildren(*_EXTENSIONS):
+            yield "", extension.get("title")
+            if extension.tag == "Button":
+                yield "-0", extension.get("selectedTitle")
+            elif extension.tag == "Label" and extension.get("prompt"):
+                yield "-prompt", extension.get("prompt")
+            elif extension.tag == "ComboBox":
+                for index, item in enumerate(extension.iterchildren("item")):
+                    yield f"-{index}", item.get("title")
+
+    for gear in element.iterchildren("gearText"):
+        values = gear.get("values")
+        if values is not None:
+            for index, value in enumerate(values.split("|")):
+                yield f"-texts_{index}", value
+        yield "-texts_def", gear.get("default")
+
+
+def scan_component(package_id, component_id, component_name, path):
+    """流式解析一个组件文件，返回其中需要翻译的 [(KEY, 文本)]，空文本被忽略"""
+    prefix = f"{package_id}{component_id}-"
+    entries = []
+    for _, element in etree.iterparse(path, events=("end",), recover=True):
+        parent = element.getparent()
+        if parent is None or parent.tag != "displayList":
+            continue
+        element_id = element.get("id")
+        if element_id:
+            for suffix, text in _element_texts(element):
+                if text:
+                    entries.append((f'name="{prefix}{element_id}{suffix}" mz="{component_name}"', text))
+
+        # 元件处理完后立即释放
+        element.clear()
+        while element.getprevious() is not None:
+            del parent[0]
+    return entries
+
+
+def _scan_task(task):
+    return scan_component(*task)
+
+
+def scan_project(project_dir, workers=None, progress=None):
+    """
+    扫描整个FairyGUI工程，按包路径、package.xml中的组件顺序和元件顺序逐条产出 (KEY, 文本)。
+    workers: 并行解析的进程数，None表示CPU核数，1表示在当前进程解析
+    progress: 每解析完一个组件文件回调 progress("扫描组件", 已完成数量, 文件总数)
+    """
+    packages = find_packages(project_dir)
+    if not packages:
+        raise ValueError(f"没有找到package.xml: {project_dir}")
+
+    tasks = []
+    for package_file in packages:
+        package_id, components = read_package(package_file)
+        for component_id, component_name, path in components:
+            if not os.path.exists(path):
+                print(f"组件文件不存在，已跳过: {path}")
+                continue
+            tasks.append((package_id, component_id, component_name, path))
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(tasks) >= SERIAL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # 按块分发，避免每个小文件都要一次进程间通信
+            chunksize = max(1, len(tasks) // (workers * 8))
+            try:
+                for done, entries in enumerate(pool.map(_scan_task, tasks, chunksize=chunksize), start=1):
+                    yield from entries
+                    if progress:
+                        progress("扫描组件", done, len(tasks))
+            except BaseException:
+                # 中止 (如progress回调取消了任务) 时不再等待还没开始解析的组件文件
+                pool.shutdown(cancel_futures=True)
+                raise
+    else:
+        for done, task in enumerate(tasks, start=1):
+            yield from _scan_task(task)
+            if progress:
+                progress("扫描组件", done, len(tasks))
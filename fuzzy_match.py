@@ -0,0 +1,219 @@
+import re
+import zlib
+
+import numpy as np
+
+"""
+近似匹配: 用n-gram MinHash和LSH分桶为未匹配的旧键和新键寻找候选，
+只对落在同一个桶里的候选计算相似度，不做全量两两比较，耗时与键的数量近似成线性。
+用于识别FairyGUI组件改名后KEY变化、文本不变 (或几乎不变) 的条目。
+"""
+
+# n-gram长度，中文文本较短，使用二元组
+NGRAM_SIZE = 2
+
+# MinHash的哈希函数数量，按BAND_SIZE个一组分桶
+NUM_PERMUTATIONS = 64
+BAND_SIZE = 4
+
+# 每个新键最多保留的候选数量 (按共同的桶数排序)
+MAX_CANDIDATES = 16
+
+# 排序邻近法中每个新条目向前、向后各取的旧条目数量
+NEIGHBOUR_WINDOW = 4
+
+# 超过该大小的桶 (如大量重复的"确定") 不提供候选，避免退化为两两比较
+MAX_BUCKET_SIZE = 64
+
+# 相似度中文本和KEY的权重，以及判定为改名的最低相似度
+VALUE_WEIGHT = 0.7
+KEY_WEIGHT = 0.3
+DEFAULT_THRESHOLD = 0.75
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+# FairyGUI多语言KEY: name="包ID组件ID-元件ID后缀" mz="组件名"
+_KEY_PATTERN = re.compile(r'\s*name="([^"]*)"\s+mz="([^"]*)"\s*$')
+
+
+def _text(item):
+    """空值 (None或NaN) 视为空文本"""
+    return "" if item is None or item != item else str(item)
+
+
+def ngrams(text, n=NGRAM_SIZE):
+    """文本的n-gram集合，比n短的文本整体作为一个元素"""
+    text = _text(text)
+    if len(text) <= n:
+        return {text}
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+def key_parts(key):
+    """
+    KEY中的 (name, mz) 属性值，去掉所有KEY共有的 name="..." mz="..." 格式部分；
+    不是这种格式的KEY整体作为name，mz为空。
+    """
+    key = _text(key)
+    match = _KEY_PATTERN.match(key)
+    return match.groups() if match else (key, "")
+
+
+def key_ngrams(parts):
+    """KEY相似度使用的n-gram集合，只包含属性值"""
+    name, mz = parts
+    return ngrams(name) | ngrams(mz) if mz else ngrams(name)
+
+
+def related_keys(old_parts, new_parts):
+    """
+    可能是改名的两个KEY: 属于同一个组件 (mz相同)，或name相同 (包ID、组件ID和元件ID都不变，只是组件改名)。
+    元件ID (如n3) 在每个组件中都会重复出现，只有元件ID相同不算相关，
+    避免 "确定"、"取消" 这类常见文本改写无关的行。
+
+    >>> related_keys(key_parts('name="ui7f3k20a1b-n3" mz="ShopPanel"'), key_parts('name="ui7f3k20a1b-n3" mz="StorePanel"'))
+    True
+    >>> related_keys(key_parts('name="ui7f3k20a1b-n3" mz="ShopPanel"'), key_parts('name="ui7f3k20a1b-n5" mz="ShopPanel"'))
+    True
+    >>> related_keys(key_parts('name="ui7f3k20a1b-n3" mz="ShopPanel"'), key_parts('name="xx99yy00q9z-n3" mz="BagPanel"'))
+    False
+    """
+    return old_parts[1] == new_parts[1] or old_parts[0] == new_parts[0]
+
+
+class MinHashIndex:
+    """MinHash签名的LSH索引: 签名按组分桶，同一个桶中的元素互为候选"""
+
+    # 批量计算签名时每批的文本数量，限制中间矩阵的内存
+    BATCH_SIZE = 1024
+
+    def __init__(self, num_permutations=NUM_PERMUTATIONS, band_size=BAND_SIZE, seed=1):
+        rng = np.random.default_rng(seed)
+        # a*x+b 不能超出uint64，x是32位哈希值
+        self._a = rng.integers(1, 1 << 31, num_permutations, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, num_permutations, dtype=np.uint64)
+        self.band_size = band_size
+        self.buckets = {}
+
+    def signatures(self, shingle_sets):
+        """批量计算MinHash签名，返回 (文本数量, 哈希函数数量) 的数组"""
+        result = np.empty((len(shingle_sets), len(self._a)), dtype=np.uint64)
+        for start in range(0, len(shingle_sets), self.BATCH_SIZE):
+            batch = shingle_sets[start:start + self.BATCH_SIZE]
+            lengths = np.fromiter((len(shingles) for shingles in batch), dtype=np.int64, count=len(batch))
+            hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingles in batch for shingle in shingles),
+                                 dtype=np.uint64, count=int(lengths.sum()))
+            permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+            offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            result[start:start + len(batch)] = np.minimum.reduceat(permuted, offsets, axis=0)
+        return result
+
+    def _bands(self, signature):
+        for start in range(0, len(signature), self.band_size):
+            yield start, signature[start:start + self.band_size].tobytes()
+
+    def add_all(self, shingle_sets):
+        """按位置加入所有文本"""
+        for item, signature in enumerate(self.signatures(shingle_sets)):
+            for band in self._bands(signature):
+                self.buckets.setdefault(band, []).append(item)
+
+    def query_all(self, shingle_sets):
+        """逐个产出与每个文本落在同一个桶的元素 {元素: 共同的桶数}"""
+        for signature in self.signatures(shingle_sets):
+            counts = {}
+            for band in self._bands(signature):
+                bucket = self.buckets.get(band, ())
+                if len(bucket) > MAX_BUCKET_SIZE:
+                    continue
+                for item in bucket:
+                    counts[item] = counts.get(item, 0) + 1
+            yield counts
+
+
+def sorted_neighbours(old_items, new_items, window=NEIGHBOUR_WINDOW):
+    """
+    排序邻近法: 把新旧条目放在一起排序，每个新条目取排序后前后window个旧条目作为候选。
+    返回每个新条目的候选旧条目位置列表。
+    """
+    merged = sorted([(item, 0, i) for i, item in enumerate(old_items)] +
+                    [(item, 1, j) for j, item in enumerate(new_items)])
+    old_ranks = [i for _, is_new, i in merged if not is_new]
+    # 每个新条目之前的旧条目数量，即它在old_ranks中的插入位置
+    candidates = [None] * len(new_items)
+    seen_old = 0
+    for _, is_new, index in merged:
+        if is_new:
+            candidates[index] = old_ranks[max(0, seen_old - window):seen_old + window]
+        else:
+            seen_old += 1
+    return candidates
+
+
+def find_renames(old_keys, old_values, new_keys, new_values, threshold=DEFAULT_THRESHOLD):
+    """
+    为未匹配的旧键和新键配对，返回 [(旧键位置, 新键位置, 相似度)]。
+    相似度 = 文本的n-gram Jaccard相似度 * VALUE_WEIGHT + KEY的相似度 * KEY_WEIGHT，
+    KEY的相似度只按name和mz的属性值计算；mz和name都不同的KEY不配对 (见related_keys)。
+    候选来自文本和KEY两个LSH索引，以及按 (文本, KEY) 和按KEY排序的邻近条目
+    (后者处理大量重复文本的情况)，按相似度从高到低贪心配对，每个键最多配对一次。
+
+    >>> find_renames(['name="ui7f3k20a1b-n3" mz="ShopPanel"'], ['确定'], ['name="xx99yy00q9z-n3" mz="BagPanel"'], ['确定'])
+    []
+    >>> [(i, j) for i, j, _ in find_renames(['name="ui7f3k20a1b-n3" mz="ShopPanel"'], ['确定'],
+    ...                                      ['name="ui7f3k20a1b-n3" mz="StorePanel"'], ['确定'])]
+    [(0, 0)]
+    """
+    if not len(old_keys) or not len(new_keys):
+        return []
+
+    old_value_grams = [ngrams(value) for value in old_values]
+    old_parts = [key_parts(key) for key in old_keys]
+    new_parts = [key_parts(key) for key in new_keys]
+    old_key_grams = [key_ngrams(parts) for parts in old_parts]
+    new_value_grams = [ngrams(value) for value in new_values]
+    new_key_grams = [key_ngrams(parts) for parts in new_parts]
+
+    value_index, key_index = MinHashIndex(), MinHashIndex()
+    value_index.add_all(old_value_grams)
+    key_index.add_all(old_key_grams)
+
+    by_value = sorted_neighbours([(_text(v), _text(k)) for k, v in zip(old_keys, old_values)],
+                                 [(_text(v), _text(k)) for k, v in zip(new_keys, new_values)])
+    by_key = sorted_neighbours([_text(k) for k in old_keys], [_text(k) for k in new_keys])
+
+    scored = []
+    lsh_candidates = zip(value_index.query_all(new_value_grams), key_index.query_all(new_key_grams))
+    for j, (value_counts, key_counts) in enumerate(lsh_candidates):
+        for item, count in key_counts.items():
+            value_counts[item] = value_counts.get(item, 0) + count
+        # 常见文本会让桶变得很大，只保留共同桶最多的候选
+        candidates = set(sorted(value_counts, key=value_counts.get, reverse=True)[:MAX_CANDIDATES])
+        candidates.update(by_value[j], by_key[j])
+        value_grams, key_grams, parts = new_value_grams[j], new_key_grams[j], new_parts[j]
+        for i in candidates:
+            if not related_keys(old_parts[i], parts):
+                continue
+            # KEY的相似度最多为1，文本相似度不够时不必再计算KEY
+            value_score = VALUE_WEIGHT * jaccard(value_grams, old_value_grams[i])
+            if value_score + KEY_WEIGHT < threshold:
+                continue
+            score = value_score + KEY_WEIGHT * jaccard(key_grams, old_key_grams[i])
+            if score >= threshold:
+                scored.append((score, i, j))
+
+    pairs, used_old, used_new = [], set(), set()
+    for score, i, j in sorted(scored, key=lambda item: (-item[0], item[1], item[2])):
+        if i in used_old or j in used_new:
+            continue
+        used_old.add(i)
+        used_new.add(j)
+        pairs.append((i, j, score))
+    return sorted(pairs)
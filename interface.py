@@ -51,12 +51,9 @@ class XMLFunctions :
 
 
 def excelSheet_modulation(sheet) :
-    # A loop to Delete empty rows
-
-    # A loop to Delete empty columns
-
-    # return the new sheet
-    pass
+    # Delete empty rows and columns in a single compaction pass, then return the sheet
+    from scripts import ExcelProcessor
+    return ExcelProcessor.clean_sheet(sheet)
 
 class ExcelElementsClass :
     def __init__(self, id, name, description, niveau) :
@@ -0,0 +1,104 @@
+import sys
+
+import numpy as np
+
+"""
+紧凑的键值表: 对比、合并等操作共用的源数据结构。
+KEY经过sys.intern驻留，相同的KEY字符串在进程中只保存一份；
+每个语言列是按行号排列的列表，index是KEY到行号的哈希索引。
+目标表格逐行查索引即可完成对齐，不需要构建DataFrame或复制目标表格。
+"""
+
+
+def intern_key(key):
+    """字符串KEY驻留，其他类型原样返回"""
+    return sys.intern(key) if type(key) is str else key
+
+
+class KeyTable:
+    """
+    按KEY索引的多列表格，重复KEY的规则与字典一致:
+    保留第一次出现的位置，值以最后一次出现的为准。
+    """
+
+    __slots__ = ("keys", "columns", "index")
+
+    def __init__(self, column_names=("VALUE1",)):
+        self.keys = []
+        self.columns = {name: [] for name in column_names}
+        self.index = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    @property
+    def column_names(self):
+        return list(self.columns)
+
+    def add(self, key, *values):
+        """加入一行，values与列名一一对应"""
+        key = intern_key(key)
+        row = self.index.get(key)
+        if row is None:
+            self.index[key] = len(self.keys)
+            self.keys.append(key)
+            for column, value in zip(self.columns.values(), values):
+                column.append(value)
+        else:
+            for column, value in zip(self.columns.values(), values):
+                column[row] = value
+
+    @classmethod
+    def from_pairs(cls, pairs, column="VALUE1"):
+        """由 (KEY, 值) 构建单列的表"""
+        table = cls((column,))
+        for key, value in pairs:
+            table.add(key, value)
+        return table
+
+    @classmethod
+    def coerce(cls, source, column="VALUE1"):
+        """KeyTable原样返回，字典 {KEY: 值} 转换为单列的表"""
+        if isinstance(source, KeyTable):
+            return source
+        return cls.from_pairs(source.items(), column)
+
+    def select(self, names):
+        """只包含names中的列的表，与原表共用KEY和索引，不复制数据"""
+        table = KeyTable(())
+        table.keys, table.index = self.keys, self.index
+        table.columns = {name: self.columns[name] for name in names}
+        return table
+
+    def lookup(self, key):
+        """KEY所在的行号，不存在时为None"""
+        return self.index.get(key)
+
+    def positions(self, keys):
+        """每个KEY所在的行号数组，不存在时为-1"""
+        get = self.index.get
+        return np.fromiter((get(key, -1) for key in keys), dtype=np.intp, count=len(keys))
+
+    def key_array(self):
+        array = np.empty(len(self.keys), dtype=object)
+        array[:] = self.keys
+        return array
+
+    def column_array(self, name="VALUE1"):
+        """一列的值，object数组，不做类型推断"""
+        array = np.empty(len(self.keys), dtype=object)
+        array[:] = self.columns[name]
+        return array
+
+    def __getstate__(self):
+        # 索引可以由KEY重建，不写入缓存
+        return self.keys, self.columns
+
+    def __setstate__(self, state):
+        keys, self.columns = state
+        # 从缓存加载的字符串没有驻留，重新驻留并重建索引
+        self.keys = [intern_key(key) for key in keys]
+        self.index = {key: row for row, key in enumerate(self.keys)}
@@ -0,0 +1,167 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+"""
+Excel解析缓存: 以文件内容哈希为键，把解析后的表格保存到缓存目录，
+同一个文件再次读取时直接加载，不再经过openpyxl解析。
+"""
+
+# 缓存格式版本，解析逻辑变化时递增使旧缓存失效
+CACHE_VERSION = 1
+
+# 默认缓存目录和容量上限
+DEFAULT_CACHE_DIR = os.environ.get("I18NTOOL_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "i18ntool")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_CACHE_SUFFIX = ".pkl"
+
+
+class ParseCache:
+    """
+    基于内容哈希的解析缓存，缓存文件按最近使用时间做LRU淘汰。
+    同一个文件可以按不同的解析参数 (variant) 分别缓存。
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def file_digest(path, chunk_size=1 << 20):
+        """计算文件内容的哈希值"""
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _entry_path(self, digest, variant):
+        name = f"{digest}-v{CACHE_VERSION}"
+        if variant:
+            name += "-" + hashlib.sha1(variant.encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.cache_dir, name + _CACHE_SUFFIX)
+
+    def get(self, path, variant="", digest=None):
+        """
+        读取缓存，未命中时返回None；无法加载的缓存 (损坏，或依赖的库和类已经变化) 视为未命中并删除。
+        digest: 已经算好的文件哈希，None时重新计算
+        """
+        entry = self._entry_path(digest or self.file_digest(path), variant)
+        try:
+            f = open(entry, 'rb')
+        except OSError:
+            return None
+        try:
+            with f:
+                data = pickle.load(f)
+        except Exception as e:
+            # 如升级pandas后旧的DataFrame无法反序列化，抛出的可能是ModuleNotFoundError、AttributeError等
+            print(f"解析缓存无法加载，已删除: {str(e)}")
+            try:
+                os.remove(entry)
+            except OSError:
+                pass
+            return None
+        # 更新访问时间，供LRU淘汰使用
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return data
+
+    def put(self, path, data, variant="", digest=None):
+        """
+        写入缓存，写入失败 (如目录只读，或数据无法序列化) 时忽略，不留下临时文件。
+        digest: 已经算好的文件哈希，None时重新计算
+        """
+        entry = self._entry_path(digest or self.file_digest(path), variant)
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry)
+            tmp_path = None
+        except Exception as e:
+            # 除OSError外，pickle.dump还可能抛出PicklingError、TypeError等
+            print(f"写入解析缓存失败: {str(e)}")
+            return
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+        self.evict()
+
+    def load(self, path, loader, variant=""):
+        """命中缓存时直接返回，否则调用loader(path)解析并写入缓存；文件哈希只计算一次"""
+        digest = self.file_digest(path)
+        data = self.get(path, variant, digest)
+        if data is None:
+            data = loader(path)
+            self.put(path, data, variant, digest)
+        return data
+
+    def _entries(self):
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            if not name.endswith(_CACHE_SUFFIX):
+                continue
+            entry = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(entry)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        return entries
+
+    def evict(self):
+        """按最近使用时间淘汰缓存，直到总大小不超过max_bytes"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(entry)
+                total -= size
+            except OSError:
+                pass
+
+    def invalidate(self, path=None):
+        """删除指定文件当前内容的全部缓存；不指定文件时清空整个缓存目录"""
+        prefix = self.file_digest(path) + "-" if path else ""
+        removed = 0
+        for _, _, entry in self._entries():
+            if os.path.basename(entry).startswith(prefix):
+                try:
+                    os.remove(entry)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """返回全局默认缓存 (首次调用时创建)，被禁用时返回None"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ParseCache()
+    return _default_cache or None
+
+
+def set_default_cache(cache):
+    """替换全局默认缓存，传入False可禁用缓存"""
+    global _default_cache
+    _default_cache = cache
@@ -1,14 +1,464 @@
 from openpyxl import load_workbook, Workbook
 import lxml.etree as etree
+import numpy as np
 import pandas as pd
-from openpyxl.styles import PatternFill
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.comments import Comment
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+import contextlib
+import hashlib
+import io
+import itertools
+import json
 import os
-from io import BytesIO  # Add this import
+import secrets
+import shutil
+import tempfile
+from parse_cache import ParseCache, get_default_cache
+from key_table import KeyTable
+from fairygui_scanner import scan_project
+from fuzzy_match import DEFAULT_THRESHOLD as DEFAULT_RENAME_THRESHOLD, find_renames
+from tracing import span, trace_operation
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from xml.sax.saxutils import escape
 
 """
 核心功能模块: 包含所有XML和Excel处理功能
 """
 
+def _object_array(values):
+    """把任意列数据转换为一维object数组，避免pandas/numpy推断类型"""
+    if not isinstance(values, (list, np.ndarray, pd.Series, pd.Index)):
+        values = list(values)
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def report_progress(progress, stage, done, total):
+    """向调用方报告处理阶段，progress为None时忽略；回调可以抛出异常来中止处理"""
+    if progress:
+        progress(stage, done, total)
+
+
+# 逐行处理时每隔多少行在阶段内报告一次进度，取消也在报告时生效
+PROGRESS_INTERVAL = 2000
+
+
+def iter_with_progress(items, progress, stage, done, total, expected=None):
+    """
+    逐个产出items，每PROGRESS_INTERVAL个报告一次阶段内的进度: progress("阶段 (已处理数量)", done+比例, total)。
+    expected为预计的数量，未知时进度停留在阶段开始处，只更新已处理的数量；
+    比例不会达到1，阶段内的进度总是小于下一个阶段。progress为None时原样产出。
+    """
+    if not progress:
+        yield from items
+        return
+    for count, item in enumerate(items, start=1):
+        yield item
+        if count % PROGRESS_INTERVAL == 0:
+            fraction = min(count / expected, 0.99) if expected else 0
+            progress(f"{stage} ({count})", done + fraction, total)
+
+
+def _header_names(header):
+    """按pandas的规则生成列名: 空标题为"Unnamed: n"，重复标题追加".n"后缀"""
+    names, seen = [], {}
+    for idx, name in enumerate(header):
+        if name is None:
+            name = f"Unnamed: {idx}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _column_positions(names, columns):
+    """
+    按标题解析columns中各列的位置 (按表格中的顺序)，不存在的列会被忽略。
+    标题之外的列没有列名，按pandas的规则以"Unnamed: n"指定
+    """
+    positions = set()
+    for name in columns:
+        if name in names:
+            positions.add(names.index(name))
+        elif isinstance(name, str) and name.startswith("Unnamed: ") and name[len("Unnamed: "):].isdigit():
+            position = int(name[len("Unnamed: "):])
+            if position >= len(names):
+                positions.add(position)
+    return sorted(positions)
+
+
+class ExcelReader:
+    """Excel读取层: 只读取需要的列，读取后端可以通过register替换或扩展"""
+
+    backends = {}
+    default_backend = "openpyxl"
+
+    @classmethod
+    def register(cls, name, reader):
+        """注册读取后端，reader(path, columns) 返回DataFrame"""
+        cls.backends[name] = reader
+
+    @classmethod
+    def read(cls, path, columns=None, backend=None):
+        """
+        读取活动工作表，第一行作为标题。
+        columns: 只读取这些列 (不存在的列会被忽略)，None表示全部列
+        """
+        backend = backend or cls.default_backend
+        if backend not in cls.backends:
+            raise ValueError(f"不支持的读取后端: {backend}")
+        return cls.backends[backend](path, columns)
+
+    @staticmethod
+    def read_openpyxl(path, columns=None):
+        """
+        以read_only模式打开工作簿，用values_only逐行读取单元格的值。
+        指定columns时先按标题确定列的位置，每行只保留这些列的单元格
+        """
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            ws = wb.active
+            # 部分工具写出的尺寸信息不准确，重新按实际内容读取
+            ws.reset_dimensions()
+            rows = ws.iter_rows(values_only=True)
+            header = list(next(rows, ()))
+            positions = None if columns is None else _column_positions(_header_names(header), columns)
+            data = [[] for _ in (header if positions is None else positions)]
+            # 已读取的行数、最后一个非空行为止的行数和列数
+            count = kept = width = kept_width = 0
+            for row in rows:
+                if positions is None:
+                    # 每行长度可能不同，超出已有列数时补出新列
+                    if len(row) > len(data):
+                        data.extend([None] * count for _ in range(len(row) - len(data)))
+                    for values, value in zip(data, row):
+                        values.append(value)
+                    for values in data[len(row):]:
+                        values.append(None)
+                else:
+                    for values, position in zip(data, positions):
+                        values.append(row[position] if position < len(row) else None)
+                count += 1
+                width = max(width, len(row))
+                if any(value is not None for value in row):
+                    kept, kept_width = count, width
+        finally:
+            wb.close()
+
+        # 与pandas一致: 去掉末尾的空行，列数按保留的行计算，缺少的单元格补None
+        width = max(len(header), kept_width)
+        names = _header_names(header + [None] * (width - len(header)))
+        if positions is None:
+            positions = range(width)
+        frame = {}
+        for position, values in zip(positions, data):
+            if position >= width:
+                continue
+            # 与pandas一致: 空字符串视为空单元格
+            frame[names[position]] = [None if value == "" else value for value in values[:kept]]
+        return pd.DataFrame(frame)
+
+    @staticmethod
+    def read_pandas(path, columns=None):
+        """使用pandas.read_excel读取"""
+        if columns is None:
+            return pd.read_excel(path)
+        return pd.read_excel(path, usecols=lambda name: name in columns)
+
+
+ExcelReader.register("openpyxl", ExcelReader.read_openpyxl)
+ExcelReader.register("pandas", ExcelReader.read_pandas)
+
+
+def read_excel(path, columns=None, backend=None):
+    """读取Excel表格，同一文件内容的重复读取直接从解析缓存加载"""
+    backend = backend or ExcelReader.default_backend
+    columns = list(columns) if columns is not None else None
+
+    def loader(file_path):
+        return ExcelReader.read(file_path, columns, backend)
+
+    with span(f"读取Excel {os.path.basename(path)}"):
+        cache = get_default_cache()
+        if cache is None:
+            return loader(path)
+        return cache.load(path, loader, variant=f"{backend}:{columns}")
+
+
+def _normalized_rows(rows, width):
+    """与ExcelReader.read_openpyxl的规则一致: 空字符串视为空单元格，每行补齐到width，丢弃末尾的空行"""
+    # 暂缓输出的空行数量，后面还有内容时才输出
+    pending = 0
+    for row in rows:
+        values = list(row)
+        if "" in values:
+            values = [None if value == "" else value for value in values]
+        if values.count(None) == len(values):
+            pending += 1
+            continue
+        for _ in range(pending):
+            yield [None] * width
+        pending = 0
+        if len(values) < width:
+            values.extend([None] * (width - len(values)))
+        yield values
+
+
+@contextlib.contextmanager
+def open_rows(path):
+    """
+    以read_only模式逐行读取活动工作表，不把整个表格载入内存。
+    产出 (列名, 行迭代器)，每行是可以修改的列表
+    """
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        ws.reset_dimensions()
+        rows = ws.iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        yield _header_names(header), _normalized_rows(rows, len(header))
+    finally:
+        wb.close()
+
+
+def _build_key_table(names, rows, columns):
+    """用KEY列和columns中存在的列构建KeyTable，columns为None时使用KEY以外的全部列；缺少KEY列时返回None"""
+    names = list(names)
+    if 'KEY' not in names:
+        return None
+    if columns is None:
+        columns = [name for name in names if name != 'KEY']
+    columns = [name for name in columns if name in names]
+    positions = [names.index(name) for name in ['KEY', *columns]]
+    table = KeyTable(columns)
+    for row in rows:
+        table.add(*(row[position] for position in positions))
+    return table
+
+
+def read_key_table(path, columns=('VALUE1',), backend=None):
+    """
+    读取Excel表格的KEY列和columns中的列，构建KeyTable，不存在的列会被忽略。
+    openpyxl后端逐行读取，不经过DataFrame；同一文件内容的重复读取直接从解析缓存加载。
+    表格缺少KEY列时返回None
+    """
+    backend = backend or ExcelReader.default_backend
+    columns = list(columns) if columns is not None else None
+
+    def loader(file_path):
+        if backend == "openpyxl":
+            with open_rows(file_path) as (names, rows):
+                return _build_key_table(names, rows, columns)
+        frame = ExcelReader.read(file_path, None if columns is None else ['KEY', *columns], backend)
+        return _build_key_table(frame.columns, frame.itertuples(index=False, name=None), columns)
+
+    with span(f"读取Excel {os.path.basename(path)}"):
+        cache = get_default_cache()
+        if cache is None:
+            return loader(path)
+        return cache.load(path, loader, variant=f"keytable:{backend}:{columns}")
+
+
+# 对比流程的阶段数: 读取源文件、读取目标表格、对比、写出结果
+COMPARE_STAGES = 4
+
+# 流式写出XML时的默认缓冲区大小 (字节)
+DEFAULT_XML_BUFFER_SIZE = 1 << 16
+
+# 游戏表XML的声明和命名空间
+GAME_XML_DECLARATION = b'<?xml version="1.0" encoding="UTF-8" standalone="no" ?>\n'
+GAME_XML_NSMAP = {'xsi': "http://www.w3.org/2001/XMLSchema-instance"}
+
+# XML 1.0中不允许出现的控制字符 (保留\t \n \r)
+_XML_CONTROL_BYTES = bytes(b for b in range(0x20) if b not in (0x09, 0x0A, 0x0D))
+
+
+class _ControlCharFilter:
+    """
+    按块读取文件的类文件对象，在字节流经时剔除控制字符 (如ETX \x03)。
+    UTF-8多字节序列不会包含小于0x80的字节，因此可以直接按字节过滤。
+    """
+
+    def __init__(self, path, chunk_size=1 << 16):
+        self._file = open(path, 'rb')
+        self._chunk_size = chunk_size
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._chunk_size
+        while True:
+            chunk = self._file.read(size)
+            if not chunk:
+                return b""
+            chunk = chunk.translate(None, _XML_CONTROL_BYTES)
+            # 整块都被过滤掉时继续读取，空字节串会被解析器当作文件结束
+            if chunk:
+                return chunk
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _create_temp_file(directory, suffix=".tmp"):
+    """
+    在directory中新建临时文件，返回 (fd, 路径)。
+    与tempfile.mkstemp不同，权限与open()新建的文件一致 (0666去掉umask)，而不是0600
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    while True:
+        path = os.path.join(directory, f"tmp{secrets.token_hex(6)}{suffix}")
+        try:
+            return os.open(path, flags, 0o666), path
+        except FileExistsError:
+            continue
+
+
+class _HashingFile(io.RawIOBase):
+    """写入文件的同时计算内容的SHA-1，与ParseCache.file_digest的结果一致"""
+
+    def __init__(self, fd):
+        self._file = open(fd, 'wb', buffering=0)
+        self._digest = hashlib.sha1()
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        # 原始写入可能只写出一部分，只统计实际写出的字节，其余由BufferedWriter重试
+        n = self._file.write(data)
+        if n:
+            self._digest.update(memoryview(data)[:n])
+            self.size += n
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+    def hexdigest(self):
+        return self._digest.hexdigest()
+
+
+class OutputManifest:
+    """
+    输出目录中的清单文件，记录每个导出文件的内容哈希、大小和修改时间，
+    导出时据此判断内容是否变化，没有变化的文件不重新写出。
+    """
+
+    FILE_NAME = ".i18ntool-manifest.json"
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, self.FILE_NAME)
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        if not isinstance(self.entries, dict):
+            self.entries = {}
+
+    def get(self, output_file):
+        return self.entries.get(os.path.basename(output_file))
+
+    def set(self, output_file, record):
+        self.entries[os.path.basename(output_file)] = record
+
+    def save(self):
+        """写入清单，写入失败 (如目录只读) 时忽略，下次导出时会重新比较文件内容"""
+        try:
+            fd, tmp_path = _create_temp_file(os.path.dirname(self.path))
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"写入输出清单失败: {str(e)}")
+
+
+def _output_record(output_file, digest):
+    stat = os.stat(output_file)
+    return {"digest": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _output_unchanged(output_file, digest, size, previous):
+    """现有文件的内容是否与刚写出的相同"""
+    try:
+        stat = os.stat(output_file)
+    except OSError:
+        return False
+    if stat.st_size != size:
+        return False
+    # 文件自上次导出后没有被改动过时直接使用清单中的哈希，否则重新计算
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        return previous.get("digest") == digest
+    return ParseCache.file_digest(output_file) == digest
+
+
+def write_output(output_file, write, previous=None, text=False, buffer_size=DEFAULT_XML_BUFFER_SIZE):
+    """
+    调用write(文件对象) 把内容写到同一目录的临时文件，同时计算内容哈希。
+    内容与现有文件相同时丢弃临时文件，现有文件和它的修改时间保持不变；否则原子替换现有文件。
+    previous: 清单中该文件上次的记录，可以省去读取现有文件
+    text: 为True时write得到UTF-8文本文件对象，否则为二进制文件对象
+    返回 (是否写出, 新的清单记录)
+    """
+    fd, tmp_path = _create_temp_file(os.path.dirname(os.path.abspath(output_file)))
+    try:
+        raw = _HashingFile(fd)
+        with io.BufferedWriter(raw, buffer_size) as binary:
+            if text:
+                with io.TextIOWrapper(binary, encoding='utf-8') as f:
+                    write(f)
+            else:
+                write(binary)
+        digest = raw.hexdigest()
+
+        if _output_unchanged(output_file, digest, raw.size, previous):
+            os.remove(tmp_path)
+            return False, _output_record(output_file, digest)
+
+        if os.path.exists(output_file):
+            shutil.copymode(output_file, tmp_path)
+        os.replace(tmp_path, output_file)
+        return True, _output_record(output_file, digest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# 标记颜色，所有单元格共享同一组样式对象
+_STATUS_FILLS = {
+    "新增": PatternFill(start_color="92D050", end_color="92D050", fill_type="solid"),  # 绿色
+    "修改": PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid"),  # 黄色
+    "冲突": PatternFill(start_color="FFC000", end_color="FFC000", fill_type="solid"),  # 橙色
+    "改名": PatternFill(start_color="9BC2E6", end_color="9BC2E6", fill_type="solid"),  # 蓝色
+}
+_HEADER_FONT = Font(bold=True)
+_HEADER_BORDER = Border(left=Side(style="thin"), right=Side(style="thin"),
+                        top=Side(style="thin"), bottom=Side(style="thin"))
+_HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="top")
+
+
+def _cell_value(value):
+    """把NaN/NaT转换为空单元格"""
+    if value is None or value is pd.NaT or (isinstance(value, float) and value != value):
+        return None
+    return value
+
+
 class XMLProcessor:
     """XML处理相关的功能"""
     
@@ -25,62 +475,166 @@ class XMLProcessor:
     @staticmethod
     def save_xml_file(root, output_path):
         """保存XML文件并添加XML声明"""
-        etree.ElementTree(root).write(output_path, pretty_print=True, encoding="utf-8")
-        
-        # 添加XML声明
-        with open(output_path, 'r', encoding='utf-8') as file:
-            xml_content = file.read()
-
-        if not xml_content.startswith('<?xml'):
-            xml_content = '<?xml version="1.0" encoding="UTF-8" standalone="no" ?>\n' + xml_content
-            with open(output_path, 'w', encoding='utf-8') as file:
-                file.write(xml_content)
-    
+        with open(output_path, 'wb') as file:
+            file.write(GAME_XML_DECLARATION)
+            etree.ElementTree(root).write(file, pretty_print=True, encoding="utf-8")
+
+    @staticmethod
+    def write_game_xml(output_path, field_names, rows, previous=None):
+        """
+        以游戏表格式流式写出XML，每次只构建一个<entry>元素，
+        缩进与pretty_print的输出保持一致。
+        内容与现有文件相同时不改动文件，返回 (是否写出, 清单记录)，见write_output
+        """
+        def write(file):
+            file.write(GAME_XML_DECLARATION)
+            with etree.xmlfile(file, encoding="utf-8") as xf:
+                with xf.element("root", nsmap=GAME_XML_NSMAP):
+                    xf.write("\n  ")
+                    with xf.element("data"):
+                        xf.write("\n    ")
+                        remaining = iter(rows)
+                        first_row = next(remaining, None)
+                        if first_row is None:
+                            xf.write(etree.Element("Template"))
+                        else:
+                            with xf.element("Template"):
+                                for row in itertools.chain([first_row], remaining):
+                                    xf.write("\n      ")
+                                    xf.write(XMLProcessor._create_game_entry(field_names, row))
+                                xf.write("\n    ")
+                        xf.write("\n  ")
+                    xf.write("\n")
+            file.write(b"\n")
+
+        return write_output(output_path, write, previous)
+
     @staticmethod
-    def excel_to_xml(input_path, output_path):
-        """将Excel文件转换为XML格式"""
+    def _create_game_entry(field_names, values):
+        """创建一个带缩进的游戏表entry元素"""
+        entry = etree.Element("entry")
+        entry.text = "\n        "
+        child = None
+        for field_name, value in zip(field_names, values):
+            child = etree.SubElement(entry, field_name)
+            child.text = value
+            child.tail = "\n        "
+        if child is not None:
+            child.tail = "\n      "
+        return entry
+
+    @staticmethod
+    def iter_string_entries(input_file):
+        """
+        流式读取FairyGUI多语言XML，逐条产出 (KEY, VALUE)。
+        KEY由<string>的全部属性拼接而成，处理完的元素立即清理，内存占用与文件大小无关。
+        """
+        with _ControlCharFilter(input_file) as stream:
+            for _, string in etree.iterparse(stream, events=("end",), tag="string"):
+                # 构建完整的属性字符串作为KEY
+                key = " ".join(f'{attr_name}="{attr_value}"' for attr_name, attr_value in string.attrib.items())
+                # 获取标签内容作为VALUE
+                value = string.text if string.text else ""
+
+                # 释放已处理的元素
+                string.clear()
+                while string.getprevious() is not None:
+                    del string.getparent()[0]
+
+                if key:  # 只有当属性存在时才添加
+                    yield key, value
+
+    @staticmethod
+    def write_language_xml(output_file, keys, values, buffer_size=DEFAULT_XML_BUFFER_SIZE, previous=None):
+        """
+        把一种语言的键值流式写为UILanguage XML，条目逐条经缓冲区写入磁盘。
+        KEY是完整的属性字符串，直接作为<string>的属性输出。
+        内容与现有文件相同时不改动文件，返回 (是否写出, 清单记录)，见write_output
+        """
+        def write(f):
+            f.write('<?xml version="1.0" encoding="utf-8"?>\n<resources>\n')
+            for key, value in zip(keys, values):
+                f.write(f'  <string {escape(key)}>{escape(value)}</string>\n')
+            f.write('</resources>')
+
+        return write_output(output_file, write, previous, text=True, buffer_size=buffer_size)
+
+    @staticmethod
+    def excel_to_xml(input_path, output_path, buffer_size=DEFAULT_XML_BUFFER_SIZE, workers=None, progress=None):
+        """
+        将Excel文件转换为XML格式。
+        workers: 大于1时表格只解析一次，各语言列交给进程池并行导出，输出与串行模式逐字节相同
+        progress: 每个语言文件生成后回调 progress(language, 已完成数量, 语言总数)
+        内容没有变化的语言文件不重新写出 (保留修改时间，避免Unity/FairyGUI重新导入)
+        返回 {"languages": 语言数量, "written": 写出的文件数, "skipped": 内容未变而跳过的文件数,
+              "stages": 各阶段的耗时和内存}
+        """
         try:
-            # 读取Excel文件
-            df = pd.read_excel(input_path)
-            # 获取列名作为语言标识
-            languages = df.columns[1:]  # 跳过第一列（键名列）
-            key_column = df.iloc[:, 1]  # 获取第一列作为键名
-            
-            # 为每种语言生成对应的XML文件
-            for col_idx, language in enumerate(languages, start=1):
-                # 创建输出文件名
-                output_file = os.path.join(output_path, f'UILanguage_{language}.xml')
-    
-                # 获取当前语言的值
-                value_column_data = df.iloc[:, col_idx]
-    
-                # 创建XML内容
-                xml_content = '<?xml version="1.0" encoding="utf-8"?>\n<resources>\n'
-    
-                # 遍历数据并添加到XML中
-                for index, key in key_column.items():
-                    value = value_column_data[index]
-                    # 确保值不是NaN且键不为空
-                    if pd.notna(value) and pd.notna(key) and str(key).strip():
-                        # 将键名作为属性名
-                        xml_content += f'  <string {str(key)}>{str(value)}</string>\n'
-    
-                xml_content += '</resources>'
-    
-                # 保存XML文件
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(xml_content)
-    
-                print(f"已生成语言文件: {output_file}")
+            with trace_operation("excel_to_xml") as operation:
+                # 读取Excel文件
+                report_progress(progress, "读取表格", 0, 1)
+                df = read_excel(input_path)
+                # 获取列名作为语言标识
+                languages = df.columns[1:]  # 跳过第一列（键名列）
+                key_column = df.iloc[:, 1]  # 获取第一列作为键名
+                # 键不能为空
+                valid_keys = key_column.notna() & (key_column.astype(str).str.strip() != "")
+
+                def language_tasks():
+                    # 为每种语言准备输出文件名和有效的键值
+                    for col_idx, language in enumerate(languages, start=1):
+                        output_file = os.path.join(output_path, f'UILanguage_{language}.xml')
+                        # 获取当前语言的值，确保值不是NaN且键不为空
+                        value_column_data = df.iloc[:, col_idx]
+                        mask = valid_keys & value_column_data.notna()
+                        yield (language, output_file,
+                               key_column[mask].astype(str).tolist(), value_column_data[mask].astype(str).tolist())
+
+                manifest = OutputManifest(output_path)
+                finished, written = [], []
+
+                def report(language, output_file, result):
+                    changed, record = result
+                    manifest.set(output_file, record)
+                    if changed:
+                        print(f"已生成语言文件: {output_file}")
+                        written.append(language)
+                    else:
+                        print(f"语言文件没有变化，已跳过: {output_file}")
+                    finished.append(language)
+                    report_progress(progress, language, len(finished), len(languages))
+
+                try:
+                    if workers and workers > 1:
+                        # 子进程中的阶段无法记录，整体记为一个阶段
+                        with span("并行写出语言文件"), ProcessPoolExecutor(max_workers=workers) as pool:
+                            futures = {
+                                pool.submit(XMLProcessor.write_language_xml, output_file, keys, values, buffer_size,
+                                            manifest.get(output_file)):
+                                    (language, output_file)
+                                for language, output_file, keys, values in language_tasks()
+                            }
+                            for future in as_completed(futures):
+                                report(*futures[future], future.result())
+                    else:
+                        for language, output_file, keys, values in language_tasks():
+                            with span(f"写出 {language}"):
+                                result = XMLProcessor.write_language_xml(output_file, keys, values, buffer_size,
+                                                                         manifest.get(output_file))
+                            report(language, output_file, result)
+                finally:
+                    # 部分语言失败时也记录已经完成的文件
+                    manifest.save()
 
             print("所有语言文件生成完成！")
-            return True
+            return {"languages": len(languages), "written": len(written), "skipped": len(finished) - len(written),
+                    "stages": operation.stages}
         except Exception as e:
             print(f"Excel转XML失败: {str(e)}")
             raise
-    
+
     @staticmethod
-    def excel_to_xml_game(input_path, output_path):
+    def excel_to_xml_game(input_path, output_path, progress=None):
         """
         将Excel文件转换为XML格式，每个条目包含 KEY, ID, Value1, Value2, Tag.
         输出格式:
@@ -98,98 +652,114 @@ class XMLProcessor:
             </Template>
           </data>
         </root>
+        内容与现有文件相同时不重新写出，返回 {"entries", "written", "skipped", "stages"}
         """
         try:
-            df = pd.read_excel(input_path)
-
-            required_columns = ["KEY", "ID", "Value1", "Value2", "Tag"]
-            
-            # Validate that the required columns exist
-            for col_name in required_columns:
-                if col_name not in df.columns:
-                    raise ValueError(f"Excel file missing a required column: {col_name}")
-
-            # Create the root element for the XML with xsi namespace
-            NSMAP = {'xsi': "http://www.w3.org/2001/XMLSchema-instance"}
-            root_xml_element = etree.Element("root", nsmap=NSMAP)
-            
-            data_element = etree.SubElement(root_xml_element, "data")
-            template_element = etree.SubElement(data_element, "Template")
-
-            # Iterate through each row in the DataFrame
-            for index, row_data in df.iterrows():
-                entry_element = etree.SubElement(template_element, "entry") # Add entry to Template
-                
-                key_val = row_data.get("KEY", "")
-                id_val = row_data.get("ID", "")
-                value1_val = row_data.get("Value1", "")
-                value2_val = row_data.get("Value2", "")
-                tag_val = row_data.get("Tag", "")
-
-                # Create sub-elements for each required column
-                key_sub_element = etree.SubElement(entry_element, "KEY")
-                key_sub_element.text = str(key_val) if pd.notna(key_val) else ""
-                
-                id_sub_element = etree.SubElement(entry_element, "ID")
-                id_sub_element.text = str(id_val) if pd.notna(id_val) else ""
-                
-                value1_sub_element = etree.SubElement(entry_element, "Value1")
-                value1_sub_element.text = str(value1_val) if pd.notna(value1_val) else ""
-                
-                value2_sub_element = etree.SubElement(entry_element, "Value2")
-                value2_sub_element.text = str(value2_val) if pd.notna(value2_val) else ""
-                
-                tag_sub_element = etree.SubElement(entry_element, "Tag")
-                tag_sub_element.text = str(tag_val) if pd.notna(tag_val) else ""
-
-            # Create an ElementTree object
-            # tree = etree.ElementTree(root_xml_element) # Not strictly needed if passing root_xml_element to save_xml_file
+            with trace_operation("excel_to_xml_game") as operation:
+                required_columns = ["KEY", "ID", "Value1", "Value2", "Tag"]
+                report_progress(progress, "读取表格", 0, 2)
+                df = read_excel(input_path, required_columns)
             
-            # Define the output file name.
-            if os.path.isdir(output_path):
-                output_file_path = os.path.join(output_path, 'strings-zh_tc.xml')
+                # Validate that the required columns exist
+                for col_name in required_columns:
+                    if col_name not in df.columns:
+                        raise ValueError(f"Excel file missing a required column: {col_name}")
+
+                # Define the output file name.
+                if os.path.isdir(output_path):
+                    output_file_path = os.path.join(output_path, 'strings-zh_tc.xml')
+                else:
+                    # Ensure the directory for the output file exists if a full path is given
+                    output_dir = os.path.dirname(output_path)
+                    if output_dir: # Check if output_dir is not an empty string
+                        os.makedirs(output_dir, exist_ok=True)
+                    output_file_path = output_path
+
+                # Read the required columns as arrays, empty cells become ""
+                columns = [df[col_name].astype(str).where(df[col_name].notna(), "").to_numpy()
+                           for col_name in required_columns]
+
+                # Stream entries one by one, the declaration goes out in the first write
+                report_progress(progress, "写出XML", 1, 2)
+                manifest = OutputManifest(os.path.dirname(os.path.abspath(output_file_path)))
+                with span("写出XML"):
+                    rows = iter_with_progress(zip(*columns), progress, "写出XML", 1, 2, len(df))
+                    written, record = XMLProcessor.write_game_xml(output_file_path, required_columns, rows,
+                                                                  manifest.get(output_file_path))
+                manifest.set(output_file_path, record)
+                manifest.save()
+                report_progress(progress, "完成", 2, 2)
+
+            if written:
+                print(f"游戏 已生成XML文件: {output_file_path}")
             else:
-                # Ensure the directory for the output file exists if a full path is given
-                output_dir = os.path.dirname(output_path)
-                if output_dir: # Check if output_dir is not an empty string
-                    os.makedirs(output_dir, exist_ok=True)
-                output_file_path = output_path
-
-            # Save XML file using the existing save_xml_file method for pretty printing and declaration
-            XMLProcessor.save_xml_file(root_xml_element, output_file_path)
-    
-            print(f"游戏 已生成XML文件: {output_file_path}")
-            return True
+                print(f"游戏 XML文件没有变化，已跳过: {output_file_path}")
+            return {"entries": len(df), "written": int(written), "skipped": int(not written),
+                    "stages": operation.stages}
         except Exception as e:
             print(f"Excel转XML (game format) 失败: {str(e)}")
             raise
     
 
+    @staticmethod
+    def _is_convertor_entry(entry):
+        """entry是否位于 /root/data/LanguageStringConvertor 下"""
+        ancestor = entry
+        for tag in ("LanguageStringConvertor", "data", "root"):
+            ancestor = ancestor.getparent()
+            if ancestor is None or ancestor.tag != tag:
+                return False
+        return ancestor.getparent() is None
+
+    @staticmethod
+    def iter_convertor_entries(input_file):
+        """
+        流式读取LanguageStringConvertor格式的XML，按文档顺序逐条产出 (KEY, VALUE1)。
+        只处理 /root/data/LanguageStringConvertor/entry，缺少的字段为""。
+        每个entry只遍历一次子元素，处理完立即清理，内存占用与文件大小无关。
+        """
+        for _, entry in etree.iterparse(input_file, events=("end",), tag="entry"):
+            if not XMLProcessor._is_convertor_entry(entry):
+                # 其他位置的entry不输出，只清理其内容
+                entry.clear()
+                continue
+
+            key = value = ""
+            found_key = found_value = False
+            for child in entry:
+                if child.tag == "KEY" and not found_key:
+                    key, found_key = child.text, True
+                elif child.tag == "VALUE1" and not found_value:
+                    value, found_value = child.text, True
+            yield key, value
+
+            # 释放已处理的entry
+            entry.clear()
+            while entry.getprevious() is not None:
+                del entry.getparent()[0]
+
     @staticmethod
     def xml_to_excel(input_file, output_file):
-        """将XML文件转换为Excel格式"""
+        """
+        将XML文件转换为Excel格式，返回 {"entries": 条目数量, "stages": 各阶段的耗时和内存}。
+        边解析边以write-only模式写出，整个文件不会载入内存。
+        """
         try:
-            # 解析XML文件
-            tree = etree.parse(input_file)
-            
-            # 查找所有entry元素
-            xpath_expression = "/root/data/LanguageStringConvertor/entry"
-            items = tree.xpath(xpath_expression)
+            with trace_operation("xml_to_excel") as operation:
+                wb = Workbook(write_only=True)
+                ws = wb.create_sheet("Sheet")
+                ws.append(["KEY", "VALUE1"])  # 添加标题行
 
-            # 创建新的Excel文件
-            wb = Workbook()
-            ws = wb.active
-            ws.append(["KEY", "VALUE1"])  # 添加标题行
+                entries = 0
+                with span("解析XML并生成表格"):
+                    for key, value in XMLProcessor.iter_convertor_entries(input_file):
+                        ws.append([key, value])
+                        entries += 1
 
-            # 提取XML数据并添加到Excel
-            for item in items:
-                id_value = item.find("KEY").text if item.find("KEY") is not None else ""
-                name_value = item.find("VALUE1").text if item.find("VALUE1") is not None else ""
-                ws.append([id_value, name_value])
-            
-            # 保存Excel文件
-            wb.save(output_file)
-            return True
+                with span("保存Excel"):
+                    # 保存Excel文件
+                    wb.save(output_file)
+            return {"entries": entries, "stages": operation.stages}
         except Exception as e:
             print(f"XML转Excel失败: {str(e)}")
             raise
@@ -200,267 +770,873 @@ class ExcelProcessor:
     
     @staticmethod
     def clean_sheet(sheet):
-        """清理Excel表格中的空行和空列"""
-        # 删除空行
-        rows_to_delete = list(sheet.iter_rows(min_row=1, max_row=sheet.max_row))
-        for row in reversed(rows_to_delete):
-            if all(cell.value is None for cell in row):
-                sheet.delete_rows(row[0].row, amount=1)
-
-        # 删除空列
-        cols_to_delete = list(sheet.iter_cols(min_col=1, max_col=sheet.max_column))
-        for col in reversed(cols_to_delete):
-            if all(cell.value is None for cell in col):
-                sheet.delete_cols(col[0].col_idx, amount=1)
-        
+        """
+        清理Excel表格中的空行和空列。
+        只遍历已存在的单元格: 先找出非空的行和列，再一次性把保留的单元格移动到压缩后的位置，
+        耗时与单元格数量成正比，不会像逐行delete_rows那样反复移动后面的所有单元格。
+        """
+        cells = sheet._cells  # openpyxl的delete_rows/delete_cols同样直接操作该字典
+        rows, cols = set(), set()
+        for (row, col), cell in cells.items():
+            if cell.value is not None:
+                rows.add(row)
+                cols.add(col)
+
+        # 旧行号/列号 -> 压缩后的行号/列号
+        row_map = {row: idx for idx, row in enumerate(sorted(rows), start=1)}
+        col_map = {col: idx for idx, col in enumerate(sorted(cols), start=1)}
+
+        # 空行和空列中的单元格被丢弃，其余单元格连同样式、批注和超链接一起移动
+        packed = {}
+        for (row, col), cell in cells.items():
+            new_row, new_col = row_map.get(row), col_map.get(col)
+            if new_row is None or new_col is None:
+                continue
+            cell.row, cell.column = new_row, new_col
+            packed[(new_row, new_col)] = cell
+        sheet._cells = packed
+
         return sheet
     
     @staticmethod
-    def compare_excel(input_file, dist_file):
+    def write_styled_rows(output_file, columns, styled_rows):
         """
-        比较两个Excel表格的KEY和VALUE1字段，直接更新dist_file文件，
+        以write-only模式单次流式写出工作簿，同时为标记的行和单元格设置填充颜色，
+        标记随每一行给出，不需要预先收集所有行的标记。
+        styled_rows: 按行产出 (数据, 整行状态, {列索引: 状态}, {列索引: 批注文本})，不需要的标记为None
+        """
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Sheet1")
+
+        # 标题行沿用pandas导出时的样式
+        header = []
+        for name in columns:
+            cell = WriteOnlyCell(ws, value=name)
+            cell.font = _HEADER_FONT
+            cell.border = _HEADER_BORDER
+            cell.alignment = _HEADER_ALIGNMENT
+            header.append(cell)
+        ws.append(header)
+
+        try:
+            for row, status, cell_statuses, cell_comments in styled_rows:
+                values = [_cell_value(value) for value in row]
+                fill = _STATUS_FILLS.get(status)
+                if fill is None and not cell_statuses and not cell_comments:
+                    ws.append(values)
+                    continue
+                # 为整行或标记的单元格设置颜色
+                cells = []
+                for col, value in enumerate(values):
+                    cell = WriteOnlyCell(ws, value=value)
+                    cell_fill = fill or (_STATUS_FILLS.get(cell_statuses.get(col)) if cell_statuses else None)
+                    if cell_fill is not None:
+                        cell.fill = cell_fill
+                    if cell_comments and col in cell_comments:
+                        cell.comment = Comment(cell_comments[col], "i18nTool")
+                    cells.append(cell)
+                ws.append(cells)
+        except BaseException:
+            # 中止 (如取消任务) 时结束并删除openpyxl写出工作表用的临时文件，否则要等到进程退出才会删除
+            with contextlib.suppress(Exception):
+                ws.close()
+                ws._writer.cleanup()
+            raise
+
+        wb.save(output_file)
+
+    @staticmethod
+    def _rewrite_streaming(dist_file, required_columns, edit_row, extra_rows, progress=None, expected_rows=None):
+        """
+        逐行读取dist_file，修改后写出到同一目录的临时文件，完成后替换原文件，
+        目标表格不会整体载入内存。
+        required_columns: 目标表格必须包含的列
+        edit_row(行位置, 行, {列名: 列索引}): 原地修改一行，返回 (整行状态, {列索引: 状态}, {列索引: 批注}) 或None
+        extra_rows(): 所有行处理完后调用，产出追加到末尾的 {列名: 值}，整行标记为新增
+        progress: 逐行报告 "写出结果" 阶段的进度，expected_rows为目标表格的行数；
+                  回调抛出异常时删除临时文件，原文件保持不变
+        """
+        with open_rows(dist_file) as (names, rows):
+            missing = [name for name in required_columns if name not in names]
+            if missing:
+                raise ValueError(f"目标文件缺少列: {', '.join(map(str, missing))}")
+            col = {name: names.index(name) for name in required_columns}
+
+            def styled_rows():
+                tracked = iter_with_progress(rows, progress, "写出结果", 3, COMPARE_STAGES, expected_rows)
+                for position, row in enumerate(tracked):
+                    marks = edit_row(position, row, col)
+                    yield (row, *marks) if marks else (row, None, None, None)
+                for values in extra_rows():
+                    yield [values.get(name) for name in names], "新增", None, None
+
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dist_file)), suffix=".xlsx")
+            os.close(fd)
+            try:
+                ExcelProcessor.write_styled_rows(tmp_path, names, styled_rows())
+                shutil.copymode(dist_file, tmp_path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        # 读取的工作簿关闭之后才能替换原文件
+        os.replace(tmp_path, dist_file)
+
+    @staticmethod
+    def _scan_columns(dist_file, names, progress=None):
+        """
+        逐行扫描dist_file，只保留names中的列，返回 {列名: 值列表}，列表不含标题行。
+        重新写出时先用扫描的结果完成向量化对比，再按对比结果逐行写出。
+        progress: 逐行报告 "读取目标表格" 阶段的进度
+        """
+        with open_rows(dist_file) as (header, rows):
+            missing = [name for name in names if name not in header]
+            if missing:
+                raise ValueError(f"目标文件缺少列: {', '.join(map(str, missing))}")
+            indexes = [header.index(name) for name in names]
+            columns = [[] for _ in names]
+            with span("扫描目标表格"):
+                for row in iter_with_progress(rows, progress, "读取目标表格", 1, COMPARE_STAGES):
+                    for values, index in zip(columns, indexes):
+                        values.append(row[index])
+        return dict(zip(names, columns))
+
+    @staticmethod
+    def diff_keys(dist_keys, dist_values, source):
+        """
+        基于KEY连接的向量化差异计算，将每个键归类为新增、修改、未变或删除。
+
+        dist_keys/dist_values: 目标表的KEY列和VALUE1列
+        source: 源数据，KeyTable或字典 {KEY: VALUE1}
+
+        返回字典:
+          stats: {"modifications", "new_entries", "unchanged", "removed"}
+          modified/unchanged/removed: 目标表中的行位置
+          added: 新增键在源数据中的位置 (保持源顺序)
+          new_values: 与modified一一对应的新值
+          added_keys/added_values: 新增的键和值
+        """
+        source = KeyTable.coerce(source)
+        dist_keys = _object_array(dist_keys)
+        old_values = _object_array(dist_values)
+        source_values = source.column_array('VALUE1')
+
+        # 目标表每一行在源表中的位置，-1表示源表中不存在
+        positions = source.positions(dist_keys)
+        matched = positions >= 0
+        candidate_values = source_values[positions] if len(source_values) else np.full(len(dist_keys), None, dtype=object)
+
+        changed = ExcelProcessor._changed_mask(old_values, candidate_values, matched)
+
+        modified = np.flatnonzero(changed)
+        unchanged = np.flatnonzero(matched & ~changed)
+        removed = np.flatnonzero(~matched)
+        added = ExcelProcessor._unmatched(positions, len(source))
+
+        return {
+            "stats": {
+                "modifications": len(modified),
+                "new_entries": len(added),
+                "unchanged": len(unchanged),
+                "removed": len(removed),
+            },
+            "modified": modified,
+            "unchanged": unchanged,
+            "removed": removed,
+            "added": added,
+            "new_values": candidate_values[modified],
+            "added_keys": source.key_array()[added],
+            "added_values": source_values[added],
+        }
+
+    @staticmethod
+    def _changed_mask(old_values, new_values, matched):
+        """两边都为空视为相同，其余按值比较，只比较matched为True的行"""
+        both_missing = pd.isna(old_values) & pd.isna(new_values)
+        return matched & ~both_missing & (old_values != new_values)
+
+    @staticmethod
+    def _unmatched(positions, size):
+        """源表中没有被目标表任何一行对应上的行位置"""
+        seen = np.zeros(size, dtype=bool)
+        seen[positions[positions >= 0]] = True
+        return np.flatnonzero(~seen)
+
+    @staticmethod
+    def diff_columns(dist_keys, dist_columns, source):
+        """
+        按KEY对齐一次，同时对比多个语言列。
+
+        dist_keys: 目标表的KEY列
+        dist_columns: {列名: 目标表中该列的值}
+        source: 源数据的KeyTable，对比它的所有列
+
+        返回字典:
+          stats: {"modifications" (修改的单元格数), "new_entries", "unchanged" (没有任何修改的行数),
+                  "removed", "languages": {列名: {"modifications", "unchanged"}}}
+          modified: {列名: 该列修改的行位置}
+          new_values: {列名: 与modified一一对应的新值}
+          added: 新增键在源数据中的位置 (保持源顺序)
+          added_keys: 新增的键
+          added_values: {列名: 新增行的值}
+        """
+        dist_keys = _object_array(dist_keys)
+
+        # 目标表每一行在源表中的位置，-1表示源表中不存在，所有列共用
+        positions = source.positions(dist_keys)
+        matched = positions >= 0
+        added = ExcelProcessor._unmatched(positions, len(source))
+
+        modified, new_values, added_values, languages = {}, {}, {}, {}
+        row_changed = np.zeros(len(dist_keys), dtype=bool)
+        for name in source.column_names:
+            source_values = source.column_array(name)
+            old_values = _object_array(dist_columns[name])
+            candidate_values = (source_values[positions] if len(source_values)
+                                else np.full(len(dist_keys), None, dtype=object))
+            changed = ExcelProcessor._changed_mask(old_values, candidate_values, matched)
+            row_changed |= changed
+            modified[name] = np.flatnonzero(changed)
+            new_values[name] = candidate_values[modified[name]]
+            added_values[name] = source_values[added]
+            languages[name] = {
+                "modifications": len(modified[name]),
+                "unchanged": int(np.count_nonzero(matched & ~changed)),
+            }
+
+        return {
+            "stats": {
+                "modifications": sum(len(rows) for rows in modified.values()),
+                "new_entries": len(added),
+                "unchanged": int(np.count_nonzero(matched & ~row_changed)),
+                "removed": int(np.count_nonzero(~matched)),
+                "languages": languages,
+            },
+            "modified": modified,
+            "new_values": new_values,
+            "added": added,
+            "added_keys": source.key_array()[added],
+            "added_values": added_values,
+        }
+
+    @staticmethod
+    def diff_three_way(ours_keys, ours_values, base, theirs):
+        """
+        三方合并的分类: 以base为共同祖先，按KEY对齐ours (目标表) 和theirs (翻译修改后的表)，
+        一次线性扫描把目标表的每一行归类为:
+          clean: 两边的值相同
+          ours_only: 只有ours修改 (或theirs中没有该键)，保留ours
+          theirs_only: 只有theirs修改，采用theirs的值
+          conflicts: 两边都修改且结果不同，保留ours并标记冲突
+        theirs中新增的键追加为新行；base中有而ours中已删除的键不再加回。
+        base/theirs: KeyTable或字典 {KEY: VALUE1}
+
+        返回字典:
+          stats: {"clean", "ours_only", "theirs_only", "conflicts", "new_entries", "removed_in_ours"}
+          theirs_only/conflicts: 目标表中的行位置
+          theirs_values: 与theirs_only一一对应的新值
+          conflict_values: 与conflicts一一对应的theirs的值
+          added_keys/added_values: 新增的键和值
+        """
+        ours_keys = _object_array(ours_keys)
+        ours_values = _object_array(ours_values)
+        base = KeyTable.coerce(base)
+        theirs = KeyTable.coerce(theirs)
+
+        def lookup(table, keys):
+            # 每个键在另一张表中的位置和值，不存在时值为None
+            positions = table.positions(keys)
+            found = positions >= 0
+            values = table.column_array('VALUE1')
+            aligned = values[positions] if len(values) else np.full(len(keys), None, dtype=object)
+            aligned = np.where(found, aligned, None)
+            return positions, found, aligned
+
+        _, in_base, base_aligned = lookup(base, ours_keys)
+        theirs_positions, in_theirs, theirs_aligned = lookup(theirs, ours_keys)
+
+        everywhere = np.ones(len(ours_keys), dtype=bool)
+        ours_same_as_theirs = in_theirs & ~ExcelProcessor._changed_mask(ours_values, theirs_aligned, everywhere)
+        ours_same_as_base = in_base & ~ExcelProcessor._changed_mask(ours_values, base_aligned, everywhere)
+        theirs_same_as_base = in_base & ~ExcelProcessor._changed_mask(theirs_aligned, base_aligned, everywhere)
+
+        differ = in_theirs & ~ours_same_as_theirs
+        theirs_only = np.flatnonzero(differ & ours_same_as_base)
+        conflicts = np.flatnonzero(differ & ~ours_same_as_base & ~theirs_same_as_base)
+        ours_only = (differ & ~ours_same_as_base & theirs_same_as_base) | ~in_theirs
+
+        # theirs中有而ours中没有的键: base中也没有的是新增，base中有的是ours删除的
+        theirs_extra = ExcelProcessor._unmatched(theirs_positions, len(theirs))
+        extra_in_base = np.fromiter((theirs.keys[row] in base for row in theirs_extra.tolist()),
+                                    dtype=bool, count=len(theirs_extra))
+        added = theirs_extra[~extra_in_base]
+
+        return {
+            "stats": {
+                "clean": int(np.count_nonzero(ours_same_as_theirs)),
+                "ours_only": int(np.count_nonzero(ours_only)),
+                "theirs_only": len(theirs_only),
+                "conflicts": len(conflicts),
+                "new_entries": len(added),
+                "removed_in_ours": int(np.count_nonzero(extra_in_base)),
+            },
+            "theirs_only": theirs_only,
+            "theirs_values": theirs_aligned[theirs_only],
+            "conflicts": conflicts,
+            "conflict_values": theirs_aligned[conflicts],
+            "added_keys": theirs.key_array()[added],
+            "added_values": theirs.column_array('VALUE1')[added],
+        }
+
+    @staticmethod
+    def detect_renames(diff, dist_keys, dist_values, threshold=DEFAULT_RENAME_THRESHOLD):
+        """
+        在diff_keys的结果中识别改名: 把目标表中源数据没有的键与新增的键按文本和KEY的相似度配对，
+        配对成功的新键不再作为新增行，而是改写旧行的KEY和VALUE1。
+        在diff中加入 renamed (目标表中的行位置)、renamed_keys、renamed_values，
+        并从新增和删除中去掉配对的键，stats中加入 "renames"。
+        """
+        dist_keys = _object_array(dist_keys)
+        dist_values = _object_array(dist_values)
+        # 空KEY的行 (如空行) 不参与配对
+        removed = diff["removed"][pd.notna(dist_keys[diff["removed"]])]
+        pairs = find_renames(dist_keys[removed], dist_values[removed],
+                             diff["added_keys"], diff["added_values"], threshold)
+
+        old_positions = [i for i, _, _ in pairs]
+        new_positions = [j for _, j, _ in pairs]
+        kept = np.ones(len(diff["added"]), dtype=bool)
+        kept[new_positions] = False
+
+        diff["renamed"] = removed[old_positions]
+        diff["renamed_keys"] = diff["added_keys"][new_positions]
+        diff["renamed_values"] = diff["added_values"][new_positions]
+        diff["removed"] = np.setdiff1d(diff["removed"], diff["renamed"])
+        for name in ("added", "added_keys", "added_values"):
+            diff[name] = diff[name][kept]
+        diff["stats"]["renames"] = len(pairs)
+        diff["stats"]["new_entries"] -= len(pairs)
+        diff["stats"]["removed"] -= len(pairs)
+        return diff
+
+    @staticmethod
+    def update_dist(source_dict, dist_file, mode="rewrite", progress=None):
+        """
+        用已经得到的源数据 ({KEY: VALUE1} 或KeyTable) 更新dist_file (如翻译库同步出的变化)，
         并用颜色标记新增和修改的内容。
         """
         try:
-            # 获取文件
-            source = pd.read_excel(input_file)
-            dist = pd.read_excel(dist_file)
-            
-            # 确保两个表格都有KEY和VALUE1列
-            if 'KEY' not in source.columns or 'VALUE1' not in source.columns:
-                raise ValueError("源文件缺少KEY或VALUE1列")
-            if 'KEY' not in dist.columns or 'VALUE1' not in dist.columns:
-                raise ValueError("目标文件缺少KEY或VALUE1列")
-            
-            # 创建源表的键值对字典
-            source_dict = dict(zip(source['KEY'], source['VALUE1']))
-            
-            # 得到目标表原始列
-            original_columns = dist.columns.tolist()
-            
-            # 创建结果表的副本
-            result = dist.copy()
-            
-            # 记录需要标记的单元格
-            cells_to_highlight = []  # [(行索引, "新增"或"修改")]
-            
-            # 检查修改的内容
-            for idx, row in result.iterrows():
-                key = row['KEY']
-                if key in source_dict and row['VALUE1'] != source_dict[key]:
-                    # 值不同 - 更新值
-                    result.at[idx, 'VALUE1'] = source_dict[key]
-                    cells_to_highlight.append((idx, "修改"))
-            
-            # 检查新增的内容
-            existing_keys = set(result['KEY'])
-            new_rows = []
-            for key, value in source_dict.items():
-                if key not in existing_keys:
-                    # 准备新行数据
-                    new_row = {col: None for col in original_columns}
-                    new_row['KEY'] = key
-                    new_row['VALUE1'] = value
-                    new_rows.append(new_row)
-            
-            # 添加新行到结果
-            if new_rows:
-                new_df = pd.DataFrame(new_rows)
-                result = pd.concat([result, new_df], ignore_index=True)
-                # 记录新增行的索引
-                for i in range(len(new_rows)):
-                    cells_to_highlight.append((len(dist) + i, "新增"))
-            
-            # 导出为Excel (覆盖原文件)
-            result.to_excel(dist_file, index=False)
-            
-            # 打开并设置颜色
+            with trace_operation("update_dist") as operation:
+                stats = ExcelProcessor._update_dist(source_dict, dist_file, mode, progress)
+            stats["stages"] = operation.stages
+            return stats
+        except Exception as e:
+            print(f"更新目标表格失败: {str(e)}")
+            raise
+
+    @staticmethod
+    def _update_dist(source, dist_file, mode="rewrite", progress=None, detect_renames=False):
+        """
+        用源数据 (KeyTable或字典 {KEY: VALUE1}) 更新dist_file，并用颜色标记新增和修改的行。
+        mode: "rewrite" 重新写出整个表格; "patch" 只修改变化的单元格
+        detect_renames: 识别改名的键，改写旧行而不是追加新行
+        重新写出时先扫描目标表格的KEY和VALUE1列，用diff_keys完成对比，再按对比结果逐行写出。
+        """
+        source = KeyTable.coerce(source)
+        if mode == "patch":
+            return ExcelProcessor._patch_dist(source, dist_file, progress, detect_renames)
+        if mode != "rewrite":
+            raise ValueError(f"不支持的更新模式: {mode}")
+        report_progress(progress, "读取目标表格", 1, COMPARE_STAGES)
+        dist = ExcelProcessor._scan_columns(dist_file, ['KEY', 'VALUE1'], progress)
+        dist_rows = len(dist['KEY'])
+
+        report_progress(progress, "对比", 2, COMPARE_STAGES)
+        with span("对比"):
+            diff = ExcelProcessor.diff_keys(dist['KEY'], dist['VALUE1'], source)
+        if detect_renames:
+            with span("识别改名"):
+                ExcelProcessor.detect_renames(diff, dist['KEY'], dist['VALUE1'])
+        del dist
+
+        # 需要改写的行 {行位置: (状态, 新KEY, 新VALUE1)}
+        edits = {row: ("修改", None, value) for row, value in zip(diff["modified"].tolist(), diff["new_values"])}
+        if detect_renames:
+            edits.update((row, ("改名", key, value)) for row, key, value
+                         in zip(diff["renamed"].tolist(), diff["renamed_keys"], diff["renamed_values"]))
+
+        def edit_row(position, row, col):
+            edit = edits.get(position)
+            if edit is None:
+                return None
+            status, key, value = edit
+            if status == "改名":
+                row[col['KEY']] = key
+            row[col['VALUE1']] = value
+            return status, None, None
+
+        def extra_rows():
+            for key, value in zip(diff["added_keys"], diff["added_values"]):
+                yield {'KEY': key, 'VALUE1': value}
+
+        report_progress(progress, "写出结果", 3, COMPARE_STAGES)
+        with span("写出结果"):
+            ExcelProcessor._rewrite_streaming(dist_file, ['KEY', 'VALUE1'], edit_row, extra_rows, progress, dist_rows)
+        report_progress(progress, "完成", COMPARE_STAGES, COMPARE_STAGES)
+
+        return diff["stats"]
+
+    @staticmethod
+    def _scan_key_value(ws):
+        """
+        一次扫描工作表的KEY和VALUE1列，建立行号索引。
+        返回 (标题行, KEY列号, VALUE1列号, KEY列表, VALUE1列表)，列号从1开始，列表不含标题行
+        """
+        header = list(next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ()))
+        if 'KEY' not in header or 'VALUE1' not in header:
+            raise ValueError("目标文件缺少KEY或VALUE1列")
+        key_col = header.index('KEY') + 1
+        value_col = header.index('VALUE1') + 1
+
+        first_col, last_col = min(key_col, value_col), max(key_col, value_col)
+        keys, values = [], []
+        with span("扫描KEY列"):
+            for row in ws.iter_rows(min_row=2, min_col=first_col, max_col=last_col, values_only=True):
+                keys.append(row[key_col - first_col])
+                values.append(row[value_col - first_col])
+        return header, key_col, value_col, keys, values
+
+    @staticmethod
+    def _patch_dist(source, dist_file, progress=None, detect_renames=False):
+        """
+        原地修补dist_file: 只改写变化的VALUE1单元格并在末尾追加新行，
+        表格中的其他格式、工作表、列宽和批注保持不变。
+        """
+        report_progress(progress, "读取目标表格", 1, COMPARE_STAGES)
+        with span("加载工作簿"):
             wb = load_workbook(dist_file)
-            ws = wb.active
-            
-            # 定义填充颜色
-            new_fill = PatternFill(start_color="92D050", end_color="92D050", fill_type="solid")  # 绿色
-            changed_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")  # 黄色
-            
-            # 为标记的单元格设置颜色
-            for idx, status in cells_to_highlight:
-                # 调整行索引：Excel行从1开始，第1行是标题，所以+2
-                excel_row = idx + 2
-                
-                # 为整行设置颜色
-                for col in range(1, ws.max_column + 1):
-                    cell = ws.cell(row=excel_row, column=col)
-                    if status == "新增":
-                        cell.fill = new_fill
-                    elif status == "修改":
-                        cell.fill = changed_fill
-            
-            # 保存结果 (覆盖原文件)
+        ws = wb.active
+        header, key_col, value_col, keys, values = ExcelProcessor._scan_key_value(ws)
+
+        report_progress(progress, "对比", 2, COMPARE_STAGES)
+        with span("对比"):
+            diff = ExcelProcessor.diff_keys(keys, values, source)
+        if detect_renames:
+            with span("识别改名"):
+                ExcelProcessor.detect_renames(diff, keys, values)
+
+        # 只改写变化的单元格，Excel行从1开始，第1行是标题，所以+2
+        report_progress(progress, "写出结果", 3, COMPARE_STAGES)
+        with span("修改单元格"):
+            changed_fill = _STATUS_FILLS["修改"]
+            for idx, value in zip(diff["modified"].tolist(), diff["new_values"]):
+                cell = ws.cell(row=idx + 2, column=value_col, value=_cell_value(value))
+                cell.fill = changed_fill
+
+            # 改名的行改写KEY和VALUE1
+            if detect_renames:
+                renamed_fill = _STATUS_FILLS["改名"]
+                for idx, key, value in zip(diff["renamed"].tolist(), diff["renamed_keys"], diff["renamed_values"]):
+                    for col, new_value in ((key_col, key), (value_col, value)):
+                        cell = ws.cell(row=idx + 2, column=col, value=_cell_value(new_value))
+                        cell.fill = renamed_fill
+
+            # 新行追加到末尾并为整行设置颜色
+            new_fill = _STATUS_FILLS["新增"]
+            # max_row每次都会扫描所有单元格，只在追加前读取一次
+            first_row = ws.max_row + 1
+            for excel_row, key, value in zip(itertools.count(first_row), diff["added_keys"], diff["added_values"]):
+                for col in range(1, len(header) + 1):
+                    ws.cell(row=excel_row, column=col).fill = new_fill
+                ws.cell(row=excel_row, column=key_col, value=_cell_value(key))
+                ws.cell(row=excel_row, column=value_col, value=_cell_value(value))
+
+        # 保存结果 (覆盖原文件)
+        with span("保存工作簿"):
             wb.save(dist_file)
-            
-            # 返回修改的统计信息
-            modifications = sum(1 for _, status in cells_to_highlight if status == "修改")
-            new_entries = sum(1 for _, status in cells_to_highlight if status == "新增")
-            
-            stats = {
-                "modifications": modifications,
-                "new_entries": new_entries
-            }
-            
+        report_progress(progress, "完成", COMPARE_STAGES, COMPARE_STAGES)
+
+        return diff["stats"]
+
+    @staticmethod
+    def compare_excel(input_file, dist_file, mode="rewrite", progress=None, detect_renames=False):
+        """
+        比较两个Excel表格的KEY和VALUE1字段，直接更新dist_file文件，
+        并用颜色标记新增和修改的内容。
+        mode="patch" 时只修改变化的单元格，保留目标文件的格式
+        detect_renames=True 时识别改名的键，改写旧行的KEY并标记为蓝色
+        progress: 每个处理阶段开始时回调 progress(阶段, 已完成阶段数, 阶段总数)，逐行处理的阶段内每PROGRESS_INTERVAL行也会回调
+        返回的统计中 "stages" 为各阶段的耗时和内存
+        """
+        try:
+            with trace_operation("compare_excel") as operation:
+                # 获取文件
+                report_progress(progress, "读取源文件", 0, COMPARE_STAGES)
+                source = read_key_table(input_file, ['VALUE1'])
+
+                # 确保两个表格都有KEY和VALUE1列
+                if source is None or 'VALUE1' not in source.columns:
+                    raise ValueError("源文件缺少KEY或VALUE1列")
+
+                stats = ExcelProcessor._update_dist(source, dist_file, mode, progress, detect_renames)
+            stats["stages"] = operation.stages
             return stats
         except Exception as e:
             print(f"Excel对比失败: {str(e)}")
             raise
 
     @staticmethod
-    def compare_xml_excel(input_file, dist_file):
+    def _update_dist_columns(source, dist_file, mode="rewrite", progress=None):
         """
-        比较xml Excel相同的key的value值，直接更新dist_file文件，
-        并用颜色标记新增和修改的内容。
+        用源数据KeyTable的所有列更新dist_file，修改的单元格标记为黄色，新增的行整行标记为绿色。
+        mode: "rewrite" 重新写出整个表格; "patch" 只修改变化的单元格
+        """
+        if mode == "patch":
+            return ExcelProcessor._patch_dist_columns(source, dist_file, progress)
+        if mode != "rewrite":
+            raise ValueError(f"不支持的更新模式: {mode}")
+
+        names = ['KEY', *source.column_names]
+        report_progress(progress, "读取目标表格", 1, COMPARE_STAGES)
+        dist = ExcelProcessor._scan_columns(dist_file, names, progress)
+        dist_rows = len(dist['KEY'])
+
+        report_progress(progress, "对比", 2, COMPARE_STAGES)
+        with span("对比"):
+            diff = ExcelProcessor.diff_columns(dist.pop('KEY'), dist, source)
+        del dist
+
+        # 需要改写的单元格 {行位置: {列名: 新值}}
+        edits = {}
+        for name, rows in diff["modified"].items():
+            for row, value in zip(rows.tolist(), diff["new_values"][name]):
+                edits.setdefault(row, {})[name] = value
+
+        def edit_row(position, row, col):
+            cells = edits.get(position)
+            if cells is None:
+                return None
+            for name, value in cells.items():
+                row[col[name]] = value
+            return None, {col[name]: "修改" for name in cells}, None
+
+        def extra_rows():
+            for i, key in enumerate(diff["added_keys"]):
+                yield {'KEY': key, **{name: values[i] for name, values in diff["added_values"].items()}}
+
+        report_progress(progress, "写出结果", 3, COMPARE_STAGES)
+        with span("写出结果"):
+            ExcelProcessor._rewrite_streaming(dist_file, names, edit_row, extra_rows, progress, dist_rows)
+        report_progress(progress, "完成", COMPARE_STAGES, COMPARE_STAGES)
+
+        return diff["stats"]
+
+    @staticmethod
+    def _patch_dist_columns(source, dist_file, progress=None):
+        """原地修补dist_file的多个语言列，表格中的其他内容和格式保持不变"""
+        report_progress(progress, "读取目标表格", 1, COMPARE_STAGES)
+        with span("加载工作簿"):
+            wb = load_workbook(dist_file)
+        ws = wb.active
+
+        header = list(next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ()))
+        missing = [name for name in ['KEY', *source.column_names] if name not in header]
+        if missing:
+            raise ValueError(f"目标文件缺少列: {', '.join(map(str, missing))}")
+        key_col = header.index('KEY') + 1
+        value_cols = {name: header.index(name) + 1 for name in source.column_names}
+
+        # 一次扫描KEY列和所有语言列
+        first_col = min(key_col, *value_cols.values())
+        last_col = max(key_col, *value_cols.values())
+        keys, dist_columns = [], {name: [] for name in source.column_names}
+        with span("扫描表格"):
+            for row in ws.iter_rows(min_row=2, min_col=first_col, max_col=last_col, values_only=True):
+                keys.append(row[key_col - first_col])
+                for name, col in value_cols.items():
+                    dist_columns[name].append(row[col - first_col])
+
+        report_progress(progress, "对比", 2, COMPARE_STAGES)
+        with span("对比"):
+            diff = ExcelProcessor.diff_columns(keys, dist_columns, source)
+
+        # 只改写变化的单元格，Excel行从1开始，第1行是标题，所以+2
+        report_progress(progress, "写出结果", 3, COMPARE_STAGES)
+        with span("修改单元格"):
+            changed_fill = _STATUS_FILLS["修改"]
+            for name, col in value_cols.items():
+                for idx, value in zip(diff["modified"][name].tolist(), diff["new_values"][name]):
+                    cell = ws.cell(row=idx + 2, column=col, value=_cell_value(value))
+                    cell.fill = changed_fill
+
+            # 新行追加到末尾并为整行设置颜色
+            new_fill = _STATUS_FILLS["新增"]
+            first_row = ws.max_row + 1
+            for i, key in enumerate(diff["added_keys"]):
+                excel_row = first_row + i
+                for col in range(1, len(header) + 1):
+                    ws.cell(row=excel_row, column=col).fill = new_fill
+                ws.cell(row=excel_row, column=key_col, value=_cell_value(key))
+                for name, col in value_cols.items():
+                    ws.cell(row=excel_row, column=col, value=_cell_value(diff["added_values"][name][i]))
+
+        with span("保存工作簿"):
+            wb.save(dist_file)
+        report_progress(progress, "完成", COMPARE_STAGES, COMPARE_STAGES)
+
+        return diff["stats"]
+
+    @staticmethod
+    def compare_excel_columns(input_file, dist_file, columns=None, mode="rewrite", progress=None):
+        """
+        按KEY对齐两个Excel表格，一次对比所有共有的语言列，直接更新dist_file文件。
+        只有修改的单元格标记为黄色，新增的行整行标记为绿色。
+        columns: 要对比的列，None表示两边共有的除KEY和ID以外的全部列
+        mode="patch" 时只修改变化的单元格，保留目标文件的格式
+        返回的统计中 "languages" 为每一列的修改数量
         """
         try:
-            # Read the XML file content as a string
-            with open(input_file, 'r', encoding='utf-8') as f:
-                xml_content_str = f.read()
-            
-            # Remove the ETX character (ASCII 03)
-            cleaned_xml_content_str = xml_content_str.replace('\x03', '')
-            
-            # Convert the cleaned string to bytes and use BytesIO to make it file-like
-            cleaned_xml_content_bytes = cleaned_xml_content_str.encode('utf-8')
-            xml_file_like_object = BytesIO(cleaned_xml_content_bytes)
+            with trace_operation("compare_excel_columns") as operation:
+                report_progress(progress, "读取源文件", 0, COMPARE_STAGES)
+                source = read_key_table(input_file, columns)
+                if source is None:
+                    raise ValueError("源文件缺少KEY列")
 
-            # 解析XML文件 from the cleaned, file-like object
-            tree = etree.parse(xml_file_like_object)
-            
-            # 查找所有entry元素
-            xpath_expression = "//string"
-            items = tree.xpath(xpath_expression)
-            
-            # 获取文件
-            dist = pd.read_excel(dist_file)
-            
-            if 'KEY' not in dist.columns or 'VALUE1' not in dist.columns:
-                raise ValueError("目标文件缺少KEY或VALUE1列")
-            
-            # 创建源表的键值对字典
-            source_dict = {}
-            
-            # 提取XML数据并添加到字典
-            for string in items:
-                # 构建完整的属性字符串作为KEY
-                attributes = []
-                for attr_name, attr_value in string.attrib.items():
-                    attributes.append(f'{attr_name}="{attr_value}"')
-    
-                key = " ".join(attributes)  # 组合所有属性为一个完整的字符串
-                # 获取标签内容作为VALUE
-                value = string.text if string.text else ""
-            
-                # 添加到字典
-                if key:  # 只有当name属性存在时才添加
-                    source_dict[key] = value
-
-            # 打印源字典内容
-            print("Source dictionary contents:")
-            print(source_dict)
-            # 得到目标表原始列
-            original_columns = dist.columns.tolist()
-            
-            # 创建结果表的副本
-            result = dist.copy()
-            
-            # 记录需要标记的单元格
-            cells_to_highlight = []  # [(行索引, "新增"或"修改")]
-            
-            # 检查修改的内容
-            for idx, row in result.iterrows():
-                key = row['KEY']
-                if key in source_dict and row['VALUE1'] != source_dict[key]:
-                    # 值不同 - 更新值
-                    result.at[idx, 'VALUE1'] = source_dict[key]
-                    cells_to_highlight.append((idx, "修改"))
-            
-            # 检查新增的内容
-            existing_keys = set(result['KEY'])
-            new_rows = []
-            for key, value in source_dict.items():
-                if key not in existing_keys:
-                    # 准备新行数据
-                    new_row = {col: None for col in original_columns}
-                    new_row['KEY'] = key
-                    new_row['VALUE1'] = value
-                    new_rows.append(new_row)
-            
-            # 添加新行到结果
-            if new_rows:
-                new_df = pd.DataFrame(new_rows)
-                result = pd.concat([result, new_df], ignore_index=True)
-                # 记录新增行的索引
-                for i in range(len(new_rows)):
-                    cells_to_highlight.append((len(dist) + i, "新增"))
-            
-            # 导出为Excel (覆盖原文件)
-            result.to_excel(dist_file, index=False)
-            
-            # 打开并设置颜色
+                if columns is None:
+                    with span("读取目标表头"):
+                        wb = load_workbook(dist_file, read_only=True)
+                        try:
+                            dist_header = next(wb.active.iter_rows(max_row=1, values_only=True), ())
+                        finally:
+                            wb.close()
+                    columns = [name for name in source.column_names
+                               if name != 'ID' and name in dist_header]
+                else:
+                    missing = [name for name in columns if name not in source.columns]
+                    if missing:
+                        raise ValueError(f"源文件缺少列: {', '.join(map(str, missing))}")
+                if not columns:
+                    raise ValueError("两个表格没有共同的语言列")
+
+                stats = ExcelProcessor._update_dist_columns(source.select(columns), dist_file, mode, progress)
+            stats["stages"] = operation.stages
+            return stats
+        except Exception as e:
+            print(f"Excel多语言对比失败: {str(e)}")
+            raise
+
+    @staticmethod
+    def merge_excel(base_file, theirs_file, dist_file, mode="rewrite", progress=None):
+        """
+        三方合并: base_file是共同祖先，theirs_file是翻译修改后的副本，dist_file是当前的母本 (ours)。
+        只有theirs修改的值合并到dist_file并标记为黄色，新增的行标记为绿色，
+        两边都修改的冲突保留母本的值并标记为橙色，theirs的值写在该单元格的批注中。
+        mode="patch" 时只修改变化的单元格，保留目标文件的格式
+        """
+        try:
+            with trace_operation("merge_excel") as operation:
+                report_progress(progress, "读取源文件", 0, COMPARE_STAGES)
+                tables = []
+                for name, path in (("共同祖先", base_file), ("翻译", theirs_file)):
+                    table = read_key_table(path, ['VALUE1'])
+                    if table is None or 'VALUE1' not in table.columns:
+                        raise ValueError(f"{name}文件缺少KEY或VALUE1列")
+                    tables.append(table)
+                base, theirs = tables
+
+                if mode == "patch":
+                    stats = ExcelProcessor._patch_merge(base, theirs, dist_file, progress)
+                elif mode == "rewrite":
+                    stats = ExcelProcessor._rewrite_merge(base, theirs, dist_file, progress)
+                else:
+                    raise ValueError(f"不支持的更新模式: {mode}")
+            stats["stages"] = operation.stages
+            return stats
+        except Exception as e:
+            print(f"三方合并失败: {str(e)}")
+            raise
+
+    @staticmethod
+    def _conflict_comment(value):
+        return f"翻译的值: {_cell_value(value)}"
+
+    @staticmethod
+    def _rewrite_merge(base, theirs, dist_file, progress=None):
+        """重新写出整个母本的三方合并: 先扫描母本的KEY和VALUE1列，用diff_three_way分类，再逐行写出"""
+        report_progress(progress, "读取目标表格", 1, COMPARE_STAGES)
+        dist = ExcelProcessor._scan_columns(dist_file, ['KEY', 'VALUE1'], progress)
+        dist_rows = len(dist['KEY'])
+
+        report_progress(progress, "对比", 2, COMPARE_STAGES)
+        with span("对比"):
+            merge = ExcelProcessor.diff_three_way(dist['KEY'], dist['VALUE1'], base, theirs)
+        del dist
+
+        # 需要改写或标记的行 {行位置: (状态, theirs的值)}
+        edits = {row: ("修改", value) for row, value in zip(merge["theirs_only"].tolist(), merge["theirs_values"])}
+        edits.update((row, ("冲突", value)) for row, value in zip(merge["conflicts"].tolist(), merge["conflict_values"]))
+
+        def edit_row(position, row, col):
+            edit = edits.get(position)
+            if edit is None:
+                return None
+            status, value = edit
+            if status == "冲突":
+                return status, None, {col['VALUE1']: ExcelProcessor._conflict_comment(value)}
+            row[col['VALUE1']] = value
+            return status, None, None
+
+        def extra_rows():
+            for key, value in zip(merge["added_keys"], merge["added_values"]):
+                yield {'KEY': key, 'VALUE1': value}
+
+        report_progress(progress, "写出结果", 3, COMPARE_STAGES)
+        with span("写出结果"):
+            ExcelProcessor._rewrite_streaming(dist_file, ['KEY', 'VALUE1'], edit_row, extra_rows, progress, dist_rows)
+        report_progress(progress, "完成", COMPARE_STAGES, COMPARE_STAGES)
+
+        return merge["stats"]
+
+    @staticmethod
+    def _patch_merge(base, theirs, dist_file, progress=None):
+        """原地修补母本的三方合并，只改写合并和冲突的单元格"""
+        report_progress(progress, "读取目标表格", 1, COMPARE_STAGES)
+        with span("加载工作簿"):
             wb = load_workbook(dist_file)
-            ws = wb.active
-            
-            # 定义填充颜色
-            new_fill = PatternFill(start_color="92D050", end_color="92D050", fill_type="solid")  # 绿色
-            changed_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")  # 黄色
-            
-            # 为标记的单元格设置颜色
-            for idx, status in cells_to_highlight:
-                # 调整行索引：Excel行从1开始，第1行是标题，所以+2
-                excel_row = idx + 2
-                
-                # 为整行设置颜色
-                for col in range(1, ws.max_column + 1):
-                    cell = ws.cell(row=excel_row, column=col)
-                    if status == "新增":
-                        cell.fill = new_fill
-                    elif status == "修改":
-                        cell.fill = changed_fill
-            
-            # 保存结果 (覆盖原文件)
+        ws = wb.active
+        header, key_col, value_col, keys, values = ExcelProcessor._scan_key_value(ws)
+
+        report_progress(progress, "对比", 2, COMPARE_STAGES)
+        with span("对比"):
+            merge = ExcelProcessor.diff_three_way(keys, values, base, theirs)
+
+        report_progress(progress, "写出结果", 3, COMPARE_STAGES)
+        with span("修改单元格"):
+            changed_fill = _STATUS_FILLS["修改"]
+            for idx, value in zip(merge["theirs_only"].tolist(), merge["theirs_values"]):
+                cell = ws.cell(row=idx + 2, column=value_col, value=_cell_value(value))
+                cell.fill = changed_fill
+
+            conflict_fill = _STATUS_FILLS["冲突"]
+            for idx, value in zip(merge["conflicts"].tolist(), merge["conflict_values"]):
+                cell = ws.cell(row=idx + 2, column=value_col)
+                cell.fill = conflict_fill
+                cell.comment = Comment(ExcelProcessor._conflict_comment(value), "i18nTool")
+
+            new_fill = _STATUS_FILLS["新增"]
+            first_row = ws.max_row + 1
+            for excel_row, key, value in zip(itertools.count(first_row), merge["added_keys"], merge["added_values"]):
+                for col in range(1, len(header) + 1):
+                    ws.cell(row=excel_row, column=col).fill = new_fill
+                ws.cell(row=excel_row, column=key_col, value=_cell_value(key))
+                ws.cell(row=excel_row, column=value_col, value=_cell_value(value))
+
+        with span("保存工作簿"):
             wb.save(dist_file)
-            
-            # 返回修改的统计信息
-            modifications = sum(1 for _, status in cells_to_highlight if status == "修改")
-            new_entries = sum(1 for _, status in cells_to_highlight if status == "新增")
-            
-            stats = {
-                "modifications": modifications,
-                "new_entries": new_entries
-            }
-            
+        report_progress(progress, "完成", COMPARE_STAGES, COMPARE_STAGES)
+
+        return merge["stats"]
+
+    @staticmethod
+    def compare_xml_excel(input_file, dist_file, mode="rewrite", progress=None, detect_renames=False):
+        """
+        比较xml Excel相同的key的value值，直接更新dist_file文件，
+        并用颜色标记新增和修改的内容。
+        mode="patch" 时只修改变化的单元格，保留目标文件的格式
+        detect_renames=True 时识别组件改名后变化的键，改写旧行的KEY并标记为蓝色
+        progress: 每个处理阶段开始时回调 progress(阶段, 已完成阶段数, 阶段总数)，逐行处理的阶段内每PROGRESS_INTERVAL行也会回调
+        返回的统计中 "stages" 为各阶段的耗时和内存
+        """
+        try:
+            with trace_operation("compare_xml_excel") as operation:
+                # 流式解析XML，逐条构建源表的KeyTable
+                report_progress(progress, "解析XML", 0, COMPARE_STAGES)
+                with span("解析XML"):
+                    entries = XMLProcessor.iter_string_entries(input_file)
+                    source = KeyTable.from_pairs(iter_with_progress(entries, progress, "解析XML", 0, COMPARE_STAGES))
+
+                stats = ExcelProcessor._update_dist(source, dist_file, mode, progress, detect_renames)
+            stats["stages"] = operation.stages
             return stats
         except Exception as e:
             print(f"Excel对比失败: {str(e)}")
             raise
 
+    @staticmethod
+    def compare_project_excel(project_dir, dist_file, mode="rewrite", progress=None, detect_renames=False,
+                              workers=None):
+        """
+        扫描整个FairyGUI工程目录，提取所有需要翻译的文本，与Excel母本对比并更新dist_file。
+        KEY与编辑器导出的多语言XML相同，其余参数与compare_xml_excel一致。
+        workers: 并行解析组件文件的进程数，None表示CPU核数
+        """
+        try:
+            with trace_operation("compare_project_excel") as operation:
+                report_progress(progress, "扫描工程", 0, COMPARE_STAGES)
+
+                def scan_progress(stage, done, total):
+                    # 组件文件的解析进度按比例落在第一个阶段内
+                    report_progress(progress, f"{stage} ({done}/{total})", min(done / total, 0.99), COMPARE_STAGES)
+
+                with span("扫描工程"):
+                    entries = scan_project(project_dir, workers, scan_progress if progress else None)
+                    source = KeyTable.from_pairs(entries)
+
+                stats = ExcelProcessor._update_dist(source, dist_file, mode, progress, detect_renames)
+            stats["stages"] = operation.stages
+            return stats
+        except Exception as e:
+            print(f"工程对比失败: {str(e)}")
+            raise
+
 # 公共API函数，供其他模块调用
-def convert_xml_to_excel(input_file, dist_file):
+def convert_xml_to_excel(input_file, dist_file, mode="rewrite", progress=None, detect_renames=False):
     """比较和更新xml2Excel文件"""
-    stats = ExcelProcessor.compare_xml_excel(input_file, dist_file)
+    stats = ExcelProcessor.compare_xml_excel(input_file, dist_file, mode, progress, detect_renames)
+    print(f"文件已更新: {dist_file}")
+    print(f"已修改 {stats['modifications']} 个条目，新增 {stats['new_entries']} 个条目")
+    if detect_renames:
+        print(f"识别到 {stats['renames']} 个改名的条目")
+    return stats
+
+def convert_project_to_excel(project_dir, dist_file, mode="rewrite", progress=None, detect_renames=False,
+                             workers=None):
+    """扫描FairyGUI工程并更新Excel文件"""
+    stats = ExcelProcessor.compare_project_excel(project_dir, dist_file, mode, progress, detect_renames, workers)
     print(f"文件已更新: {dist_file}")
     print(f"已修改 {stats['modifications']} 个条目，新增 {stats['new_entries']} 个条目")
+    if detect_renames:
+        print(f"识别到 {stats['renames']} 个改名的条目")
     return stats
 
-def convert_excel_to_xml(input_file, output_file):
+def convert_excel_to_xml(input_file, output_file, buffer_size=DEFAULT_XML_BUFFER_SIZE, workers=None, progress=None):
     """将Excel文件转换为XML文件"""
-    return XMLProcessor.excel_to_xml(input_file, output_file)
+    return XMLProcessor.excel_to_xml(input_file, output_file, buffer_size, workers, progress)
 
-def convert_excel_to_xml_game(input_file, output_file):
+def convert_excel_to_xml_game(input_file, output_file, progress=None):
     """将Excel文件转换为游戏特定格式的XML文件"""
-    return XMLProcessor.excel_to_xml_game(input_file, output_file)
+    return XMLProcessor.excel_to_xml_game(input_file, output_file, progress)
 
-def compare_language_excel(input_file, dist_file):
+def compare_language_excel(input_file, dist_file, mode="rewrite", progress=None, detect_renames=False):
     """比较和更新Excel文件"""
-    stats = ExcelProcessor.compare_excel(input_file, dist_file)
+    stats = ExcelProcessor.compare_excel(input_file, dist_file, mode, progress, detect_renames)
     print(f"文件已更新: {dist_file}")
     print(f"已修改 {stats['modifications']} 个条目，新增 {stats['new_entries']} 个条目")
+    if detect_renames:
+        print(f"识别到 {stats['renames']} 个改名的条目")
     return stats
 
+def compare_language_excel_columns(input_file, dist_file, columns=None, mode="rewrite", progress=None):
+    """一次比较和更新Excel文件的所有语言列"""
+    stats = ExcelProcessor.compare_excel_columns(input_file, dist_file, columns, mode, progress)
+    print(f"文件已更新: {dist_file}")
+    for language, language_stats in stats["languages"].items():
+        print(f"{language}: 已修改 {language_stats['modifications']} 个单元格")
+    print(f"共修改 {stats['modifications']} 个单元格，新增 {stats['new_entries']} 个条目")
+    return stats
+
+def merge_language_excel(base_file, theirs_file, dist_file, mode="rewrite", progress=None):
+    """三方合并翻译修改后的Excel文件到母本"""
+    stats = ExcelProcessor.merge_excel(base_file, theirs_file, dist_file, mode, progress)
+    print(f"文件已更新: {dist_file}")
+    print(f"已合并 {stats['theirs_only']} 个修改，新增 {stats['new_entries']} 个条目，{stats['conflicts']} 个冲突")
+    return stats
@@ -1,8 +1,28 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
+import multiprocessing
+import queue
+import threading
+
+# 后台事件的轮询间隔 (毫秒)
+POLL_INTERVAL_MS = 100
+
+
+class JobCancelled(Exception):
+    """用户取消了正在执行的任务"""
+
+
+class Job:
+    """排队在后台线程中执行的任务，func_name为scripts模块中的公共函数名"""
+
+    def __init__(self, description, func_name, args, success_message):
+        self.description = description
+        self.func_name = func_name
+        self.args = args
+        self.success_message = success_message
+        self.cancel_event = threading.Event()
 
-from scripts import convert_xml_to_excel, convert_excel_to_xml, convert_excel_to_xml_game,compare_language_excel
 
 class ExcelToXmlConverterApp:
     def __init__(self, root):
@@ -12,6 +32,10 @@ class ExcelToXmlConverterApp:
 
         # 设置颜色主题
         self.setup_theme()
+
+        # 创建底部状态栏和后台任务线程
+        self.create_status_bar()
+        self.start_worker()
         
         # 创建主菜单
         self.create_main_menu()
@@ -26,6 +50,146 @@ class ExcelToXmlConverterApp:
         self.root.option_add("*TLabel*background", "#FDEBD0")   # 奶油色
         self.root.option_add("*TLabel*foreground", "#2C3E50")   # 深蓝色
     
+    def create_status_bar(self):
+        """创建显示任务进度的状态栏，切换界面时保留"""
+        self.status_frame = ttk.Frame(self.root)
+        self.status_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=20, pady=(10, 20))
+
+        self.status_label = ttk.Label(self.status_frame, text="空闲")
+        self.status_label.pack(fill=tk.X, pady=(0, 5))
+
+        self.progress_bar = ttk.Progressbar(self.status_frame, mode="determinate", maximum=100)
+        self.progress_bar.pack(fill=tk.X, pady=5)
+
+        self.queue_label = ttk.Label(self.status_frame, text="")
+        self.queue_label.pack(fill=tk.X, pady=(0, 5))
+
+        # 排队中的任务，选中后可以移除
+        self.queue_list = tk.Listbox(self.status_frame, height=3)
+        self.queue_list.pack(fill=tk.X, pady=5)
+
+        self.remove_button = ttk.Button(self.status_frame, text="移除选中的排队任务", command=self.remove_queued_job)
+        self.remove_button.pack(pady=5)
+
+        self.cancel_button = ttk.Button(self.status_frame, text="取消当前任务", command=self.cancel_current_job, state="disabled")
+        self.cancel_button.pack(pady=5)
+
+    def start_worker(self):
+        """启动执行任务的后台线程，线程只通过队列与界面通信"""
+        self.job_queue = queue.Queue()
+        self.event_queue = queue.Queue()
+        self.current_job = None
+        self.queued_jobs = []
+        threading.Thread(target=self.worker_loop, daemon=True).start()
+        self.root.after(POLL_INTERVAL_MS, self.poll_events)
+
+    def worker_loop(self):
+        """后台线程: 依次执行队列中的任务，不直接访问任何Tk控件"""
+        while True:
+            job = self.job_queue.get()
+            # 排队时已被移除的任务直接跳过
+            if job.cancel_event.is_set():
+                continue
+            self.event_queue.put(("start", job, None))
+
+            def progress(stage, done, total, job=job):
+                # 最后一个阶段在结果写出之后才报告，此时文件已经替换，不再取消而是按完成处理
+                if job.cancel_event.is_set() and done < total:
+                    raise JobCancelled("任务已取消")
+                self.event_queue.put(("progress", job, (stage, done, total)))
+
+            try:
+                # scripts依赖pandas/lxml/openpyxl，导入较慢，在后台线程中按需导入，保证主菜单立即显示；
+                # 静态的import语句才能被PyInstaller分析到，打包时包含scripts及其依赖
+                import scripts
+                func = getattr(scripts, job.func_name)
+                result = func(*job.args, progress=progress)
+            except JobCancelled:
+                self.event_queue.put(("cancelled", job, None))
+            except Exception as e:
+                self.event_queue.put(("error", job, e))
+            else:
+                self.event_queue.put(("done", job, result))
+
+    def poll_events(self):
+        """在主线程中处理后台线程发来的事件"""
+        try:
+            while True:
+                kind, job, payload = self.event_queue.get_nowait()
+                self.handle_event(kind, job, payload)
+        except queue.Empty:
+            pass
+        self.root.after(POLL_INTERVAL_MS, self.poll_events)
+
+    def handle_event(self, kind, job, payload):
+        """根据后台事件更新状态栏并提示结果"""
+        if kind == "start":
+            self.current_job = job
+            self.dequeue(job)
+            self.progress_bar["value"] = 0
+            self.status_label.config(text=f"正在执行: {job.description}")
+            self.cancel_button.config(state="normal")
+        elif kind == "progress":
+            stage, done, total = payload
+            self.progress_bar["value"] = done * 100 / total if total else 0
+            self.status_label.config(text=f"{job.description} - {stage}")
+        else:
+            self.current_job = None
+            self.cancel_button.config(state="disabled")
+            if kind == "done":
+                self.progress_bar["value"] = 100
+                self.status_label.config(text=f"已完成: {job.description}")
+            elif kind == "cancelled":
+                self.progress_bar["value"] = 0
+                self.status_label.config(text=f"已取消: {job.description}")
+            else:
+                self.status_label.config(text=f"失败: {job.description}")
+        self.update_queue_label()
+
+        # 结果提示框会阻塞事件处理，放在状态更新之后
+        if kind == "done":
+            messagebox.showinfo("成功", job.success_message(payload))
+        elif kind == "error":
+            messagebox.showerror("错误", f"发生错误: {str(payload)}")
+
+    def submit_job(self, description, func_name, args, success_message):
+        """把任务加入队列，由后台线程依次执行"""
+        job = Job(description, func_name, args, success_message)
+        self.queued_jobs.append(job)
+        self.queue_list.insert(tk.END, description)
+        self.job_queue.put(job)
+        self.update_queue_label()
+
+    def dequeue(self, job):
+        """从排队列表中去掉任务，返回任务是否还在排队"""
+        if job not in self.queued_jobs:
+            return False
+        index = self.queued_jobs.index(job)
+        del self.queued_jobs[index]
+        self.queue_list.delete(index)
+        return True
+
+    def update_queue_label(self):
+        self.queue_label.config(text=f"排队中的任务: {len(self.queued_jobs)}" if self.queued_jobs else "")
+
+    def remove_queued_job(self):
+        """移除选中的排队任务，后台线程取到该任务时直接跳过"""
+        selection = self.queue_list.curselection()
+        if not selection:
+            return
+        job = self.queued_jobs[selection[0]]
+        # 后台线程可能刚好开始执行该任务，此时按取消处理
+        job.cancel_event.set()
+        self.dequeue(job)
+        self.update_queue_label()
+
+    def cancel_current_job(self):
+        """取消正在执行的任务，在下一次报告进度 (处理阶段开始或每处理一批行) 时生效"""
+        if self.current_job is not None:
+            self.current_job.cancel_event.set()
+            self.status_label.config(text=f"正在取消: {self.current_job.description}")
+            self.cancel_button.config(state="disabled")
+
     def create_main_menu(self):
         """创建主菜单界面"""
         self.button1 = ttk.Button(self.root, text="多语言表格比对 xml2Excel", command=self.convert_xml_to_excel_interface)
@@ -64,6 +228,11 @@ class ExcelToXmlConverterApp:
         self.choose_folder_button = ttk.Button(self.root, text="选择文件", command=lambda: self.choose_file_dist("excel"))
         self.choose_folder_button.pack(pady=(5, 10))
 
+        # 更新模式: 只修改变化的单元格，保留母本格式
+        self.patch_mode_var = tk.BooleanVar(value=False)
+        self.patch_mode_check = ttk.Checkbutton(self.root, text="只更新变化的单元格(保留原有格式)", variable=self.patch_mode_var)
+        self.patch_mode_check.pack(pady=(10, 5))
+
         # 执行对比按钮
         self.run_button = ttk.Button(self.root, text="执行对比", command=self.run_xml_to_excel_conversion)
         self.run_button.pack(pady=(20, 10))
@@ -161,6 +330,11 @@ class ExcelToXmlConverterApp:
         self.choose_folder_button = ttk.Button(self.root, text="选择文件", command=lambda: self.choose_file_dist("excel"))
         self.choose_folder_button.pack(pady=(5, 10))
 
+        # 更新模式: 只修改变化的单元格，保留母本格式
+        self.patch_mode_var = tk.BooleanVar(value=False)
+        self.patch_mode_check = ttk.Checkbutton(self.root, text="只更新变化的单元格(保留原有格式)", variable=self.patch_mode_var)
+        self.patch_mode_check.pack(pady=(10, 5))
+
         # 执行对比按钮
         self.run_button = ttk.Button(self.root, text="执行对比", command=self.run_compare_conversion)
         self.run_button.pack(pady=(20, 10))
@@ -205,11 +379,8 @@ class ExcelToXmlConverterApp:
             messagebox.showerror("错误", "请选择输入文件、输出文件夹并提供XML文件名。")
             return
 
-        try:
-            convert_excel_to_xml(input_file, output_folder)
-            messagebox.showinfo("成功", "转换成功！")
-        except Exception as e:
-            messagebox.showerror("错误", f"发生错误: {str(e)}")
+        self.submit_job(f"导出UI多语言XML {os.path.basename(input_file)}", "convert_excel_to_xml",
+                        (input_file, output_folder), lambda result: "转换成功！")
 
     def run_excel_to_xml_conversion_game(self):
         """执行Excel转XML转换"""
@@ -220,11 +391,8 @@ class ExcelToXmlConverterApp:
             messagebox.showerror("错误", "请选择输入文件、输出文件夹并提供XML文件名。")
             return
 
-        try:
-            convert_excel_to_xml_game(input_file, output_folder)
-            messagebox.showinfo("成功", "转换成功！")
-        except Exception as e:
-            messagebox.showerror("错误", f"发生错误: {str(e)}")
+        self.submit_job(f"导出游戏表XML {os.path.basename(input_file)}", "convert_excel_to_xml_game",
+                        (input_file, output_folder), lambda result: "转换成功！")
     
     def run_compare_conversion(self):
         """执行Excel对比和更新"""
@@ -235,11 +403,8 @@ class ExcelToXmlConverterApp:
             messagebox.showerror("错误", "路径不能为空。")
             return
         
-        try:
-            stats = compare_language_excel(input_file, dist_file)
-            messagebox.showinfo("成功", f"对比成功！已修改 {stats['modifications']} 个条目，新增 {stats['new_entries']} 个条目")
-        except Exception as e:
-            messagebox.showerror("错误", f"发生错误: {str(e)}")
+        self.submit_job(f"Excel对比 {os.path.basename(input_file)}", "compare_language_excel",
+                        (input_file, dist_file, self.get_update_mode()), self.compare_success_message)
 
     def run_xml_to_excel_conversion(self):
         """执行xml2Excel对比和更新"""
@@ -250,17 +415,23 @@ class ExcelToXmlConverterApp:
             messagebox.showerror("错误", "路径不能为空。")
             return
         
-        try:
-            stats = convert_xml_to_excel(input_file, dist_file)
-            messagebox.showinfo("成功", f"对比成功！已修改 {stats['modifications']} 个条目，新增 {stats['new_entries']} 个条目")
-        except Exception as e:
-            messagebox.showerror("错误", f"发生错误: {str(e)}")
+        self.submit_job(f"XML对比 {os.path.basename(input_file)}", "convert_xml_to_excel",
+                        (input_file, dist_file, self.get_update_mode()), self.compare_success_message)
+
+    @staticmethod
+    def compare_success_message(stats):
+        """对比完成后的提示内容"""
+        return f"对比成功！已修改 {stats['modifications']} 个条目，新增 {stats['new_entries']} 个条目"
 
+    def get_update_mode(self):
+        """根据勾选框返回更新模式"""
+        return "patch" if self.patch_mode_var.get() else "rewrite"
 
     def clear_root(self):
         """清空窗口内容"""
         for widget in self.root.winfo_children():
-            widget.destroy()
+            if widget is not self.status_frame:
+                widget.destroy()
 
     def return_to_menu(self):
         """返回主菜单"""
@@ -269,6 +440,8 @@ class ExcelToXmlConverterApp:
 
 
 if __name__ == "__main__":
+    # 打包后的exe使用进程池并行导出时需要
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = ExcelToXmlConverterApp(root)
     root.mainloop()
@@ -0,0 +1,173 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+"""
+阶段计时和内存统计: 用上下文管理器划分处理阶段 (span)，记录每个阶段的耗时和内存峰值。
+
+  with trace_operation("compare_excel") as operation:
+      with span("读取源文件"):
+          ...
+  stats["stages"] = operation.stages
+
+configure_tracing(memory=True) 开启tracemalloc统计内存峰值 (会明显变慢，默认关闭)；
+configure_tracing(trace_file=...) 把所有阶段写成Chrome trace event格式的JSON，
+可以用 chrome://tracing 或 https://ui.perfetto.dev 打开。
+"""
+
+_settings = {"memory": False, "trace_file": None}
+_events = []
+_events_lock = threading.Lock()
+_local = threading.local()
+# 记录进程启动时刻，trace文件中的时间戳从这里开始计算
+_origin = time.perf_counter()
+
+
+def configure_tracing(trace_file=None, memory=False):
+    """设置trace文件路径和是否统计内存，trace_file为None时不写文件"""
+    _settings["trace_file"] = trace_file
+    _settings["memory"] = memory
+    with _events_lock:
+        _events.clear()
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+class Span:
+    """一个处理阶段: 名称、开始时间、耗时、内存峰值 (相对开始时的增量，单位字节)"""
+
+    def __init__(self, name, depth):
+        self.name = name
+        self.depth = depth
+        self.start = 0.0
+        self.seconds = 0.0
+        self.peak_bytes = None
+        self._start_memory = 0
+        self._peak_memory = 0
+
+    def as_dict(self):
+        return {"name": self.name, "depth": self.depth,
+                "seconds": round(self.seconds, 6), "peak_bytes": self.peak_bytes}
+
+
+class Operation:
+    """一次完整的处理操作，收集其中所有阶段"""
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.seconds = 0.0
+
+    @property
+    def stages(self):
+        """按开始顺序排列的阶段统计"""
+        return [item.as_dict() for item in sorted(self.spans, key=lambda item: item.start)]
+
+
+def _open_spans():
+    if not hasattr(_local, "spans"):
+        _local.spans = []
+        _local.operations = []
+    return _local.spans
+
+
+def _memory_enter(span_record, open_spans):
+    """进入阶段时把当前峰值计入外层阶段，然后重新开始统计峰值"""
+    current, peak = tracemalloc.get_traced_memory()
+    for outer in open_spans:
+        outer._peak_memory = max(outer._peak_memory, peak)
+    tracemalloc.reset_peak()
+    span_record._start_memory = current
+    span_record._peak_memory = current
+
+
+def _memory_exit(span_record, open_spans):
+    _, peak = tracemalloc.get_traced_memory()
+    span_record._peak_memory = max(span_record._peak_memory, peak)
+    span_record.peak_bytes = span_record._peak_memory - span_record._start_memory
+    if open_spans:
+        open_spans[-1]._peak_memory = max(open_spans[-1]._peak_memory, span_record._peak_memory)
+
+
+@contextlib.contextmanager
+def span(name):
+    """记录一个处理阶段，没有进行中的操作时不做任何记录"""
+    open_spans = _open_spans()
+    if not _local.operations:
+        yield None
+        return
+
+    span_record = Span(name, len(open_spans))
+    memory = _settings["memory"] and tracemalloc.is_tracing()
+    if memory:
+        _memory_enter(span_record, open_spans)
+    open_spans.append(span_record)
+    span_record.start = time.perf_counter()
+    try:
+        yield span_record
+    finally:
+        span_record.seconds = time.perf_counter() - span_record.start
+        open_spans.pop()
+        if memory:
+            _memory_exit(span_record, open_spans)
+        _local.operations[-1].spans.append(span_record)
+        _record_event(span_record)
+
+
+@contextlib.contextmanager
+def trace_operation(name):
+    """
+    开始一次处理操作，操作本身记为最外层阶段。
+    嵌套调用时 (如compare_excel内部的读取) 阶段归入最外层的操作。
+    """
+    _open_spans()
+    if _local.operations:
+        with span(name):
+            yield _local.operations[-1]
+        return
+
+    operation = Operation(name)
+    _local.operations.append(operation)
+    start = time.perf_counter()
+    try:
+        with span(name):
+            yield operation
+    finally:
+        operation.seconds = time.perf_counter() - start
+        _local.operations.pop()
+        flush_trace()
+
+
+def _record_event(span_record):
+    if not _settings["trace_file"]:
+        return
+    args = {"depth": span_record.depth}
+    if span_record.peak_bytes is not None:
+        args["peak_bytes"] = span_record.peak_bytes
+    event = {
+        "name": span_record.name,
+        "ph": "X",
+        "ts": round((span_record.start - _origin) * 1e6, 1),
+        "dur": round(span_record.seconds * 1e6, 1),
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+        "args": args,
+    }
+    with _events_lock:
+        _events.append(event)
+
+
+def flush_trace():
+    """把目前记录的所有阶段写入trace文件"""
+    trace_file = _settings["trace_file"]
+    if not trace_file:
+        return
+    with _events_lock:
+        events = list(_events)
+    with open(trace_file, 'w', encoding='utf-8') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
@@ -0,0 +1,308 @@
+import hashlib
+import os
+import sqlite3
+
+from parse_cache import ParseCache
+
+"""
+本地翻译库: 用SQLite按 (KEY, 语言) 保存每条文本，记录修订号和内容哈希。
+同步时只处理上次同步之后变化的键，输入文件内容没变时直接跳过:
+
+  with TranslationStore("project.db") as store:
+      sync_xml_excel(store, "strings.xml", "master.xlsx")     # 只把变化的键修补到母本
+      export_xml(store, "out/")                               # 只重新导出有变化的语言
+
+约定母本只通过翻译库更新；母本被其他方式修改过 (文件哈希与上次写出时不同) 时，
+会把该语言的全部内容重新同步到母本。
+
+增量同步只保证翻译库一侧的耗时与变化的键数相关；修补母本时openpyxl仍需载入和保存整个工作簿，
+耗时与母本大小成正比 (20万行约30秒)，不随变化的键数减少。
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS keys (
+    key TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS strings (
+    key TEXT NOT NULL,
+    language TEXT NOT NULL,
+    value,
+    hash BLOB,
+    revision INTEGER NOT NULL,
+    -- 同一种语言的条目连续存放，按语言读取时只扫描该语言的范围
+    PRIMARY KEY (language, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS strings_language_revision ON strings (language, revision);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT NOT NULL,
+    role TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    PRIMARY KEY (path, role)
+);
+"""
+
+# 游戏表XML的字段，KEY以外的字段作为"语言"保存
+GAME_FIELDS = ["KEY", "ID", "Value1", "Value2", "Tag"]
+
+# 按键批量查询时每条SQL的键数量，不超过SQLite的参数个数上限
+_CHUNK_SIZE = 500
+
+
+def value_hash(value):
+    """文本内容的哈希，空值为None"""
+    if value is None:
+        return None
+    return hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+
+
+def _normalize(value):
+    """把NaN和空字符串视为空值，与Excel读取的规则一致"""
+    if value is None or value == "" or (isinstance(value, float) and value != value):
+        return None
+    return value
+
+
+class TranslationStore:
+    """按 (KEY, 语言) 保存文本的SQLite翻译库"""
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('revision', 0)")
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def revision(self):
+        """整个翻译库的当前修订号，每次有内容变化的更新加1"""
+        return self.connection.execute("SELECT value FROM meta WHERE name = 'revision'").fetchone()[0]
+
+    def language_revision(self, language):
+        """某种语言最后一次变化时的修订号，没有内容时为0"""
+        row = self.connection.execute("SELECT MAX(revision) FROM strings WHERE language = ?",
+                                      (language,)).fetchone()
+        return row[0] or 0
+
+    def languages(self):
+        return [row[0] for row in self.connection.execute("SELECT DISTINCT language FROM strings ORDER BY language")]
+
+    def update(self, language, pairs):
+        """
+        写入一种语言的 (KEY, 文本)，只有内容哈希变化的条目会被写入并获得新的修订号。
+        源数据中没有的键保持不变。返回变化的 [(KEY, 文本)]，保持源顺序。
+        已有的哈希按 (language, key) 主键分批查询，不读取该语言的全部条目。
+        """
+        incoming = {}
+        for key, value in pairs:
+            if _normalize(key) is None:
+                continue
+            # 源数据中重复的键以最后一次为准
+            incoming[key] = _normalize(value)
+
+        keys = list(incoming)
+        latest = {}
+        for start in range(0, len(keys), _CHUNK_SIZE):
+            chunk = keys[start:start + _CHUNK_SIZE]
+            stored = dict(self.connection.execute(
+                f"SELECT key, hash FROM strings WHERE language = ? AND key IN ({','.join('?' * len(chunk))})",
+                (language, *chunk)))
+            for key in chunk:
+                value = incoming[key]
+                digest = value_hash(value)
+                if key not in stored or stored[key] != digest:
+                    latest[key] = (value, digest)
+        if not latest:
+            return []
+
+        revision = self.revision + 1
+        with self.connection:
+            self._add_keys(list(latest))
+            self.connection.executemany(
+                "INSERT INTO strings (key, language, value, hash, revision) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (language, key) DO UPDATE SET value = excluded.value, hash = excluded.hash, "
+                "revision = excluded.revision",
+                ((key, language, value, digest, revision) for key, (value, digest) in latest.items()))
+            self.connection.execute("UPDATE meta SET value = ? WHERE name = 'revision'", (revision,))
+        return [(key, value) for key, (value, _) in latest.items()]
+
+    def _add_keys(self, keys):
+        """新出现的键按出现顺序排在已有键之后，导出时按该顺序输出"""
+        position = self.connection.execute("SELECT COALESCE(MAX(position), -1) FROM keys").fetchone()[0]
+        existing = set()
+        for start in range(0, len(keys), _CHUNK_SIZE):
+            chunk = keys[start:start + _CHUNK_SIZE]
+            existing.update(row[0] for row in self.connection.execute(
+                f"SELECT key FROM keys WHERE key IN ({','.join('?' * len(chunk))})", chunk))
+        new_keys = [key for key in keys if key not in existing]
+        self.connection.executemany("INSERT INTO keys (key, position) VALUES (?, ?)",
+                                    ((key, position + i) for i, key in enumerate(new_keys, start=1)))
+
+    def values(self, language, since=0):
+        """按键的顺序返回一种语言的 [(KEY, 文本)]，since大于0时只返回该修订号之后变化的条目"""
+        return self.connection.execute(
+            "SELECT s.key, s.value FROM strings s JOIN keys k ON k.key = s.key "
+            "WHERE s.language = ? AND s.revision > ? ORDER BY k.position", (language, since)).fetchall()
+
+    def rows(self, languages):
+        """按键的顺序返回多种语言组成的行 [KEY, 语言1, 语言2, ...]，缺少的值为None"""
+        columns = {language: dict(self.values(language)) for language in languages}
+        keys = [row[0] for row in self.connection.execute("SELECT key FROM keys ORDER BY position")]
+        return [[key] + [columns[language].get(key) for language in languages]
+                for key in keys if any(key in columns[language] for language in languages)]
+
+    def file_state(self, path, role):
+        """上次处理该文件时记录的 (内容哈希, 修订号)，没有记录时为None"""
+        return self.connection.execute("SELECT digest, revision FROM files WHERE path = ? AND role = ?",
+                                       (os.path.abspath(path), role)).fetchone()
+
+    def set_file_state(self, path, role, revision):
+        """记录文件当前的内容哈希和对应的修订号"""
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO files (path, role, digest, revision) VALUES (?, ?, ?, ?)",
+                (os.path.abspath(path), role, ParseCache.file_digest(path), revision))
+
+    def file_unchanged(self, path, role):
+        """文件存在且内容与上次记录时相同"""
+        state = self.file_state(path, role)
+        return state is not None and os.path.exists(path) and state[0] == ParseCache.file_digest(path)
+
+
+def import_xml(store, input_file, language="VALUE1"):
+    """把FairyGUI多语言XML导入翻译库，文件内容没变时直接跳过。返回变化的 [(KEY, 文本)]"""
+    role = f"source:{language}"
+    if store.file_unchanged(input_file, role):
+        return []
+    from scripts import XMLProcessor
+    changed = store.update(language, XMLProcessor.iter_string_entries(input_file))
+    store.set_file_state(input_file, role, store.revision)
+    return changed
+
+
+def import_excel(store, input_file, columns=None):
+    """
+    把Excel表格的各列导入翻译库，KEY列作为键，其余每一列作为一种语言。
+    columns: 要导入的列，None表示除KEY以外的全部列
+    返回 {语言: 变化的 [(KEY, 文本)]}
+    """
+    role = f"source:{','.join(columns) if columns else '*'}"
+    if store.file_unchanged(input_file, role):
+        return {}
+    from scripts import read_excel
+    df = read_excel(input_file, None if columns is None else ['KEY', *columns])
+    if 'KEY' not in df.columns:
+        raise ValueError("源文件缺少KEY列")
+    names = [name for name in df.columns if name != 'KEY'] if columns is None else columns
+    missing = [name for name in names if name not in df.columns]
+    if missing:
+        raise ValueError(f"源文件缺少列: {', '.join(map(str, missing))}")
+
+    keys = df['KEY'].tolist()
+    changed = {str(name): store.update(str(name), zip(keys, df[name].tolist())) for name in names}
+    store.set_file_state(input_file, role, store.revision)
+    return changed
+
+
+def apply_to_dist(store, dist_file, language="VALUE1", progress=None):
+    """
+    把母本上次同步之后翻译库中变化的条目修补到母本的VALUE1列。
+    以母本记录的修订号为准，上次写入母本失败时下一次同步会重新修补这些条目；
+    母本在上次同步之后被其他方式修改过时，改为同步该语言的全部内容。
+    没有变化的条目时不打开母本；有变化时修补需要载入和保存整个工作簿，耗时与母本大小相关。
+    """
+    from key_table import KeyTable
+    from scripts import ExcelProcessor
+    role = f"dist:{language}"
+    if store.file_unchanged(dist_file, role):
+        since = store.file_state(dist_file, role)[1]
+        source = KeyTable.from_pairs(store.values(language, since=since))
+    else:
+        source = KeyTable.from_pairs(store.values(language))
+
+    if len(source):
+        stats = ExcelProcessor.update_dist(source, dist_file, "patch", progress)
+    else:
+        stats = {"modifications": 0, "new_entries": 0, "stages": []}
+    store.set_file_state(dist_file, role, store.revision)
+
+    # 只处理了变化的键，未变和删除的数量没有意义
+    stats.pop("unchanged", None)
+    stats.pop("removed", None)
+    stats["synced_keys"] = len(source)
+    stats["revision"] = store.revision
+    return stats
+
+
+def sync_xml_excel(store, input_file, dist_file, progress=None):
+    """compare_xml_excel的增量版本: XML先导入翻译库，再只把变化的键修补到母本"""
+    try:
+        import_xml(store, input_file)
+        return apply_to_dist(store, dist_file, progress=progress)
+    except Exception as e:
+        print(f"翻译库同步失败: {str(e)}")
+        raise
+
+
+def sync_excel(store, input_file, dist_file, progress=None):
+    """compare_excel的增量版本: Excel的VALUE1列先导入翻译库，再只把变化的键修补到母本"""
+    try:
+        import_excel(store, input_file, ['VALUE1'])
+        return apply_to_dist(store, dist_file, progress=progress)
+    except Exception as e:
+        print(f"翻译库同步失败: {str(e)}")
+        raise
+
+
+def export_xml(store, output_path, languages=None, buffer_size=None):
+    """
+    从翻译库导出UILanguage_{语言}.xml，只重新写出上次导出后有变化的语言。
+    返回 {"written": [...], "skipped": [...]}
+    """
+    from scripts import DEFAULT_XML_BUFFER_SIZE, XMLProcessor
+    written, skipped = [], []
+    for language in languages or store.languages():
+        output_file = os.path.join(output_path, f'UILanguage_{language}.xml')
+        state = store.file_state(output_file, "export")
+        revision = store.language_revision(language)
+        if state is not None and state[1] == revision and store.file_unchanged(output_file, "export"):
+            skipped.append(language)
+            continue
+        # 与excel_to_xml一致: 跳过空键和空值
+        pairs = [(str(key), str(value)) for key, value in store.values(language)
+                 if value is not None and str(key).strip()]
+        XMLProcessor.write_language_xml(output_file, [key for key, _ in pairs], [value for _, value in pairs],
+                                        buffer_size or DEFAULT_XML_BUFFER_SIZE)
+        store.set_file_state(output_file, "export", revision)
+        written.append(language)
+    return {"written": written, "skipped": skipped}
+
+
+def export_game(store, output_file):
+    """从翻译库导出游戏表格式XML，游戏表的各字段没有变化时跳过。返回是否重新写出"""
+    from scripts import XMLProcessor
+    fields = GAME_FIELDS[1:]
+    revision = max(store.language_revision(field) for field in fields)
+    state = store.file_state(output_file, "export")
+    if state is not None and state[1] == revision and store.file_unchanged(output_file, "export"):
+        return False
+    rows = ([str(value) if value is not None else "" for value in row] for row in store.rows(fields))
+    XMLProcessor.write_game_xml(output_file, GAME_FIELDS, rows)
+    store.set_file_state(output_file, "export", revision)
+    return True
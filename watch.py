@@ -0,0 +1,161 @@
+import os
+import time
+
+from key_table import KeyTable
+
+"""
+监视模式: 轮询一组 (源文件, 母本) 中源文件的修改时间和大小，源文件变化后增量同步到母本。
+
+  watcher = Watcher([("strings/zh.xml", "master.xlsx")])
+  watcher.run()   # 直到Ctrl+C
+
+- 连续多次保存只处理一次: 最后一次变化后等待debounce秒没有新的变化才开始同步
+- 每个源文件保留上一次解析的KeyTable，只把与上一次相比新增或修改的条目同步到母本
+- 同一个等待窗口内变化的所有源文件按母本汇总，每个母本只写一次
+- 启动时先把所有源文件的全部条目同步一次
+"""
+
+# 默认的轮询间隔和等待时间 (秒)
+DEFAULT_INTERVAL = 1.0
+DEFAULT_DEBOUNCE = 2.0
+
+
+def file_signature(path):
+    """文件的 (修改时间, 大小)，文件不存在时为None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_source(path):
+    """解析源文件为KeyTable: .xml为FairyGUI多语言文件，其余为包含KEY和VALUE1列的Excel表格"""
+    from scripts import XMLProcessor, read_key_table
+    if path.lower().endswith('.xml'):
+        return KeyTable.from_pairs(XMLProcessor.iter_string_entries(path))
+    table = read_key_table(path, ['VALUE1'])
+    if table is None or 'VALUE1' not in table.columns:
+        raise ValueError("源文件缺少KEY或VALUE1列")
+    return table
+
+
+def changed_entries(previous, current):
+    """current中相对previous新增或修改的 [(KEY, VALUE1)]，previous为None时返回全部条目"""
+    if previous is None:
+        return list(zip(current.keys, current.columns['VALUE1']))
+    from scripts import ExcelProcessor
+    diff = ExcelProcessor.diff_keys(previous.keys, previous.columns['VALUE1'], current)
+    modified_keys = previous.key_array()[diff["modified"]]
+    return (list(zip(modified_keys, diff["new_values"])) +
+            list(zip(diff["added_keys"], diff["added_values"])))
+
+
+class Watcher:
+    """轮询源文件并按等待窗口批量同步到母本"""
+
+    def __init__(self, pairs, mode="patch", interval=DEFAULT_INTERVAL, debounce=DEFAULT_DEBOUNCE, on_sync=None):
+        """
+        pairs: [(源文件, 母本)]，同一个母本的多个源文件按顺序合并，后面的优先
+        mode: 写入母本的方式，"patch" 或 "rewrite"
+        on_sync: 每次同步完成后回调 on_sync(结果)，结果为 {"sources", "dists": {母本: 统计}, "errors", "retry"}
+        """
+        self.pairs = list(pairs)
+        self.mode = mode
+        self.interval = interval
+        self.debounce = debounce
+        self.on_sync = on_sync
+        self.tables = {}
+        self.signatures = {}
+
+    @property
+    def sources(self):
+        return list(dict.fromkeys(source for source, _ in self.pairs))
+
+    def poll(self):
+        """返回上次轮询之后修改过的源文件 (不存在的文件不计入)"""
+        changed = []
+        for source in self.sources:
+            signature = file_signature(source)
+            if signature != self.signatures.get(source):
+                self.signatures[source] = signature
+                if signature is not None:
+                    changed.append(source)
+        return changed
+
+    def sync(self, sources):
+        """
+        解析变化的源文件，按母本汇总变化的条目，每个母本只写一次。
+        解析失败的源文件保留上一次的结果；写入失败的母本对应的源文件在返回结果的 "retry" 中，
+        下一个窗口重新同步。
+        """
+        from scripts import ExcelProcessor
+        result = {"sources": list(sources), "dists": {}, "errors": {}, "retry": []}
+
+        parsed, changes = {}, {}
+        for source in sources:
+            try:
+                parsed[source] = load_source(source)
+            except Exception as e:
+                print(f"解析源文件失败: {source}: {str(e)}")
+                result["errors"][source] = str(e)
+                continue
+            changes[source] = changed_entries(self.tables.get(source), parsed[source])
+
+        # 同一个母本的变化汇总到一张表，重复的KEY以后面的源文件为准
+        updates = {}
+        for source, dist in self.pairs:
+            if source in changes:
+                table = updates.setdefault(dist, KeyTable())
+                for key, value in changes[source]:
+                    table.add(key, value)
+
+        failed_dists = set()
+        for dist, table in updates.items():
+            if not len(table):
+                continue
+            try:
+                stats = ExcelProcessor.update_dist(table, dist, self.mode)
+            except Exception as e:
+                print(f"同步母本失败: {dist}: {str(e)}")
+                result["errors"][dist] = str(e)
+                failed_dists.add(dist)
+                continue
+            # 只同步了变化的条目，未变和删除的数量没有意义
+            stats.pop("unchanged", None)
+            stats.pop("removed", None)
+            stats["synced_keys"] = len(table)
+            result["dists"][dist] = stats
+
+        for source in parsed:
+            if any(dist in failed_dists for pair_source, dist in self.pairs if pair_source == source):
+                result["retry"].append(source)
+            else:
+                self.tables[source] = parsed[source]
+
+        if self.on_sync:
+            self.on_sync(result)
+        return result
+
+    def run(self, stop=None):
+        """
+        启动时同步所有源文件，之后持续轮询，直到stop() 返回True或收到KeyboardInterrupt。
+        """
+        self.poll()
+        pending = {}
+        retry = self.sync([source for source in self.sources if self.signatures.get(source)])["retry"]
+        pending.update(dict.fromkeys(retry, time.monotonic()))
+        try:
+            while not (stop and stop()):
+                now = time.monotonic()
+                for source in self.poll():
+                    pending[source] = now
+                # 最后一次变化之后等待debounce秒没有新的变化，再一起同步
+                if pending and now - max(pending.values()) >= self.debounce:
+                    sources = [source for source in self.sources if source in pending]
+                    pending.clear()
+                    retry = self.sync(sources)["retry"]
+                    pending.update(dict.fromkeys(retry, time.monotonic()))
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass